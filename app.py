@@ -1,8 +1,24 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash, Response, stream_with_context, send_file
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import bindparam, event, insert, inspect, select, update
+from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
+from collections import OrderedDict, defaultdict, deque, namedtuple
+import base64
+import csv
+import hashlib
+import io
+import json
+import multiprocessing
 import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from passwords import hash_passwords
 
 load_dotenv()
 
@@ -34,7 +50,7 @@ else:
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # Import models and initialize db
-from models import db, User, Ward, Bed, Patient, Oxygen, ActivityLog, MedicalRecord, Medication, Inventory, Shift, Notification, Appointment, EmergencyAlert
+from models import db, User, Ward, Bed, Patient, Oxygen, ActivityLog, MedicalRecord, Medication, Inventory, Shift, Notification, Appointment, EmergencyAlert, BedCounter, ChangeLog, notification_unread_index, BED_STATUSES, rebuild_bed_counters, apply_bed_counter_deltas, bump_data_versions, record_bulk_write, get_data_versions, ward_version_key, patient_version_key
 db.init_app(app)
 
 # Initialize database function
@@ -42,6 +58,12 @@ def init_db():
     """Initialize the database tables and indexes"""
     with app.app_context():
         db.create_all()
+        # create_all skips indexes on tables that already exist
+        notification_unread_index.create(db.engine, checkfirst=True)
+        # Seed the bed counters for databases created before they existed
+        if not BedCounter.query.first() and Bed.query.first():
+            rebuild_bed_counters(db.session)
+        activity_feed.load()
         # Create helpful indexes (SQLite: IF NOT EXISTS)
         try:
             statements = [
@@ -59,6 +81,11 @@ def init_db():
             "CREATE INDEX IF NOT EXISTS idx_patient_admitted_on ON patient (admitted_on)",
             "CREATE INDEX IF NOT EXISTS idx_patient_discharged_on ON patient (discharged_on)",
             "CREATE INDEX IF NOT EXISTS idx_patient_oxygen_required ON patient (oxygen_required)",
+            # Partial indexes: the roster sorts of the active census (discharged_on IS NULL)
+            "CREATE INDEX IF NOT EXISTS idx_patient_active_admitted_on ON patient (admitted_on) WHERE discharged_on IS NULL",
+            "CREATE INDEX IF NOT EXISTS idx_patient_active_age ON patient (age) WHERE discharged_on IS NULL",
+            "CREATE INDEX IF NOT EXISTS idx_patient_active_gender ON patient (gender) WHERE discharged_on IS NULL",
+            "CREATE INDEX IF NOT EXISTS idx_patient_active_oxygen_required ON patient (oxygen_required) WHERE discharged_on IS NULL",
             # ActivityLog
             "CREATE INDEX IF NOT EXISTS idx_activitylog_user_id ON activity_log (user_id)",
             "CREATE INDEX IF NOT EXISTS idx_activitylog_timestamp ON activity_log (timestamp)",
@@ -78,19 +105,915 @@ def init_db():
             "CREATE INDEX IF NOT EXISTS idx_notification_user_id ON notification (user_id)",
             "CREATE INDEX IF NOT EXISTS idx_notification_is_read ON notification (is_read)",
             "CREATE INDEX IF NOT EXISTS idx_notification_created_at ON notification (created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_notification_created_at_id ON notification (created_at, id)",
             # Appointment
             "CREATE INDEX IF NOT EXISTS idx_appointment_patient_id ON appointment (patient_id)",
             "CREATE INDEX IF NOT EXISTS idx_appointment_scheduled_time ON appointment (scheduled_time)",
-            "CREATE INDEX IF NOT EXISTS idx_appointment_status ON appointment (status)"
+            "CREATE INDEX IF NOT EXISTS idx_appointment_status ON appointment (status)",
+            # Inventory: grid filters, plus (sort column, id) pairs for keyset paging
+            "CREATE INDEX IF NOT EXISTS idx_inventory_category ON inventory (category)",
+            "CREATE INDEX IF NOT EXISTS idx_inventory_supplier ON inventory (supplier)",
+            "CREATE INDEX IF NOT EXISTS idx_inventory_item_name_id ON inventory (item_name, id)",
+            "CREATE INDEX IF NOT EXISTS idx_inventory_current_stock_id ON inventory (current_stock, id)",
+            "CREATE INDEX IF NOT EXISTS idx_inventory_expiry_date ON inventory (expiry_date)",
+            "CREATE INDEX IF NOT EXISTS idx_inventory_created_at_id ON inventory (created_at, id)"
             ]
             for stmt in statements:
-                db.session.execute(stmt)
+                db.session.execute(db.text(stmt))
             db.session.commit()
         except Exception:
             db.session.rollback()
 
-# Call init_db only in local development
-if not os.environ.get('VERCEL'):
+def get_bed_occupancy():
+    """Return {ward_id: {status: count}} from the materialized bed counters"""
+    occupancy = {}
+    for counter in BedCounter.query.all():
+        ward_counts = occupancy.setdefault(counter.ward_id, dict.fromkeys(BED_STATUSES, 0))
+        ward_counts[counter.status] = counter.count
+    return occupancy
+
+def summarize_bed_counts(occupancy, ward_id=None):
+    """Collapse bed counters into status totals for one ward, or the whole hospital"""
+    totals = dict.fromkeys(BED_STATUSES, 0)
+    for counter_ward_id, ward_counts in occupancy.items():
+        if ward_id is not None and counter_ward_id != ward_id:
+            continue
+        for status, count in ward_counts.items():
+            totals[status] = totals.get(status, 0) + count
+    totals['total'] = sum(totals.values())
+    return totals
+
+def get_bed_stats():
+    """Bed status totals in the shape of the bed management summary cards"""
+    bed_counts = summarize_bed_counts(get_bed_occupancy())
+    return {
+        'total': bed_counts['total'],
+        'available': bed_counts['empty'],
+        'occupied': bed_counts['occupied'],
+        'reserved': bed_counts['reserved'],
+        'cleaning': bed_counts['cleaning'],
+        'maintenance': bed_counts['maintenance']
+    }
+
+def load_patient_placements(patient_ids):
+    """Return {patient_id: (ward_name, bed_number)} for patients in an occupied bed, in one join"""
+    placements = {}
+    if not patient_ids:
+        return placements
+    rows = db.session.query(Bed.patient_id, Ward.name, Bed.bed_number).join(Ward).filter(
+        Bed.patient_id.in_(patient_ids),
+        Bed.status == 'occupied'
+    ).order_by(Bed.id)
+    for patient_id, ward_name, bed_number in rows:
+        placements.setdefault(patient_id, (ward_name, bed_number))
+    return placements
+
+def load_latest_records(patient_ids):
+    """Return {patient_id: MedicalRecord} holding each patient's most recent record, in one query"""
+    if not patient_ids:
+        return {}
+    ranked = db.session.query(
+        MedicalRecord.id.label('id'),
+        db.func.row_number().over(
+            partition_by=MedicalRecord.patient_id,
+            order_by=(MedicalRecord.created_at.desc(), MedicalRecord.id.desc())
+        ).label('position')
+    ).filter(MedicalRecord.patient_id.in_(patient_ids)).subquery()
+    records = MedicalRecord.query.join(ranked, MedicalRecord.id == ranked.c.id).filter(ranked.c.position == 1)
+    return {record.patient_id: record for record in records}
+
+def load_active_medications(patient_ids):
+    """Return {patient_id: [Medication]} of active medications, in one query"""
+    medications = defaultdict(list)
+    if not patient_ids:
+        return medications
+    rows = Medication.query.filter(
+        Medication.patient_id.in_(patient_ids),
+        Medication.status == 'active'
+    ).order_by(Medication.id)
+    for medication in rows:
+        medications[medication.patient_id].append(medication)
+    return medications
+
+def build_patient_details(patients):
+    """Attach bed, ward, latest record and active medications to each patient for the roster tables.
+
+    Runs a fixed three queries whatever the roster size, instead of three per patient.
+    """
+    patient_ids = [patient.id for patient in patients]
+    placements = load_patient_placements(patient_ids)
+    latest_records = load_latest_records(patient_ids)
+    medications = load_active_medications(patient_ids)
+    
+    patient_details = []
+    for patient in patients:
+        ward_name, bed_number = placements.get(patient.id, ('Not Assigned', 'N/A'))
+        latest_record = latest_records.get(patient.id)
+        active_medications = medications.get(patient.id, [])
+        
+        patient_info = {
+            'patient': patient,
+            'ward_name': ward_name,
+            'bed_number': bed_number,
+            'latest_record': latest_record,
+            'active_medications': active_medications,
+            'medication_count': len(active_medications)
+        }
+        patient_details.append(patient_info)
+    return patient_details
+
+def get_patient_stats():
+    """Patient summary card counts, computed in SQL rather than from the full roster"""
+    active = Patient.discharged_on.is_(None)
+    return {
+        'total_active': Patient.query.filter(active).count(),
+        'total_discharged': Patient.query.filter(Patient.discharged_on.isnot(None)).count(),
+        'oxygen_required': Patient.query.filter(active, Patient.oxygen_required == True).count(),
+        'total_medications': Medication.query.join(Patient).filter(active, Medication.status == 'active').count()
+    }
+
+def get_prescription_stats():
+    return {
+        'total_prescriptions': Medication.query.count(),
+        'active_prescriptions': Medication.query.filter_by(status='active').count(),
+        'completed_prescriptions': Medication.query.filter_by(status='completed').count(),
+        'discontinued_prescriptions': Medication.query.filter_by(status='discontinued').count()
+    }
+
+def get_shift_stats():
+    return {
+        'total_shifts': Shift.query.count(),
+        'active_shifts': Shift.query.filter_by(status='active').count(),
+        'scheduled_shifts': Shift.query.filter_by(status='scheduled').count(),
+        'completed_shifts': Shift.query.filter_by(status='completed').count()
+    }
+
+def get_staff_stats(staff_activities):
+    return {
+        'total_staff': User.query.filter_by(role='staff').count(),
+        'total_admin': User.query.filter_by(role='admin').count(),
+        'active_today': len(set([activity.user_id for activity in staff_activities if activity.timestamp.date() == datetime.now(timezone.utc).date()]))
+    }
+
+# Row deltas: mutation endpoints answer with the rows they touched, rendered
+# through the same partial the page's table loop includes, so the page can
+# patch those rows in place instead of reloading and re-querying everything.
+def render_rows(template, rows):
+    """Render (row_id, context) pairs into [{'id', 'html'}] using a row partial"""
+    return [{'id': row_id, 'html': render_template(template, **context)} for row_id, context in rows]
+
+def row_delta(rows=(), removed=(), **payload):
+    """Build a mutation response carrying rows to upsert and row ids to drop"""
+    payload['rows'] = list(rows)
+    payload['removed'] = list(removed)
+    return payload
+
+def bed_rows(bed_ids):
+    # Bed tables are virtual and render rows client-side, so beds travel as board rows, not HTML
+    return [bed_board_row(row) for row in bed_board_query().filter(Bed.id.in_(bed_ids))]
+
+def patient_rows(template, patient_ids):
+    return patient_detail_rows(template, Patient.query.filter(Patient.id.in_(patient_ids)).all())
+
+def patient_detail_rows(template, patients):
+    return render_rows(template,
+                       [(info['patient'].id, {'patient_info': info}) for info in build_patient_details(patients)])
+
+def prescription_rows(medication_ids):
+    prescriptions = db.session.query(Medication, Patient).join(Patient).filter(Medication.id.in_(medication_ids)).all()
+    return render_rows('admin/_prescription_row.html',
+                       [(medication.id, {'medication': medication, 'patient': patient}) for medication, patient in prescriptions])
+
+def shift_rows(shift_ids):
+    shifts = db.session.query(Shift, User).join(User).filter(Shift.id.in_(shift_ids)).all()
+    return render_rows('admin/_shift_row.html',
+                       [(shift.id, {'shift': shift, 'staff': staff}) for shift, staff in shifts])
+
+def staff_rows(staff_ids):
+    staff_members = User.query.filter(User.id.in_(staff_ids)).all()
+    return render_rows('admin/_staff_row.html', [(staff.id, {'staff': staff}) for staff in staff_members])
+
+class VersionedCache:
+    """Size-bounded LRU of payloads, each tagged with the data versions it was built from.
+
+    An entry is served only while the versions it was built from are still
+    current; once any of them moves the entry is rebuilt in place.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, versions, builder):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = builder()
+
+        with self._lock:
+            self._entries[key] = (versions, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups * 100, 1) if lookups else 0
+            }
+
+response_cache = VersionedCache(maxsize=int(os.environ.get('RESPONSE_CACHE_SIZE', 256)))
+
+def cached_payload(key, tables, builder):
+    """Serve builder()'s result from the response cache until one of the tables is written"""
+    versions = get_data_versions(db.session, tables)
+    return response_cache.get_or_build(key, versions, builder)
+
+def get_validator(key, tables, *extra):
+    """Return (etag, versions) for a payload built from the given tables.
+
+    Costs one lookup of the version table, so handlers can answer a matching
+    If-None-Match before running any of their own queries.
+    """
+    versions = get_data_versions(db.session, tables)
+    etag = hashlib.sha1(repr((key, versions, extra)).encode()).hexdigest()[:20]
+    return etag, versions
+
+def encode_cursor(*values):
+    """Opaque keyset cursor carrying the sort values of the last row served"""
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
+
+def keyset_page(query, sort_column, id_column, cursor=None, limit=25, row_key=None,
+                descending=True, parse_value=datetime.fromisoformat):
+    """One page of query ordered on (sort_column, id_column), newest first by default.
+
+    row_key(row) gives the (sort value, id) of a result row; by default both
+    are read off the row as attributes. parse_value turns the sort value
+    carried in a cursor back into a column value. Rows with a NULL sort value
+    come last in either direction, the same on every database, and a cursor
+    taken inside that tail carries a null sort value. Returns (rows,
+    next_cursor), with next_cursor None on the last page.
+    """
+    if row_key is None:
+        row_key = lambda row: (getattr(row, sort_column.key), getattr(row, id_column.key))
+    nullable = getattr(getattr(sort_column, 'expression', sort_column), 'nullable', False)
+    if cursor:
+        try:
+            after_value, after_id = decode_cursor(cursor)
+            after_value, after_id = (None if after_value is None else parse_value(after_value)), int(after_id)
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor')
+        id_after = id_column < after_id if descending else id_column > after_id
+        if after_value is None:
+            # Already in the NULL tail: only the remaining NULL rows follow
+            query = query.filter(sort_column.is_(None), id_after)
+        else:
+            value_after = sort_column < after_value if descending else sort_column > after_value
+            following = [value_after, db.and_(sort_column == after_value, id_after)]
+            if nullable:
+                following.append(sort_column.is_(None))
+            query = query.filter(db.or_(*following))
+    order = (sort_column.desc(), id_column.desc()) if descending else (sort_column.asc(), id_column.asc())
+    if nullable:
+        order = (order[0].nulls_last(), order[1])
+    # One extra row tells us whether another page follows
+    rows = query.order_by(*order).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(*row_key(rows[-1]))
+    return rows, next_cursor
+
+def is_not_modified(etag):
+    return request.if_none_match.contains_weak(etag)
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    # Polled data: let the browser keep it, but always revalidate
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def not_modified_response(etag):
+    return with_etag(app.response_class(status=304), etag)
+
+# CSV exports stream: rows come off the database cursor in batches of
+# EXPORT_BATCH_SIZE (yield_per), are encoded as CSV by a generator and leave
+# in chunks of about EXPORT_CHUNK_SIZE bytes, gzipped on the fly when the
+# client accepts it. Memory stays flat however many rows are exported.
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+class _CsvLineBuffer:
+    """Write target for csv.writer that hands each encoded line straight back"""
+    def write(self, line):
+        return line
+
+def export_rows(query, to_row):
+    """Stream query results in batches from a server-side cursor, mapped through to_row"""
+    for row in query.yield_per(EXPORT_BATCH_SIZE):
+        yield to_row(row)
+
+def csv_chunks(header, rows, chunk_size=EXPORT_CHUNK_SIZE):
+    """Encode header and rows as CSV, yielding UTF-8 chunks of roughly chunk_size bytes"""
+    writer = csv.writer(_CsvLineBuffer())
+    buffer = [writer.writerow(header)]
+    size = len(buffer[0])
+    for row in rows:
+        line = writer.writerow(row)
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def csv_export_response(filename, header, rows):
+    """Stream a CSV download; rows is a lazy iterable, normally from export_rows"""
+    chunks = csv_chunks(header, rows)
+    compress = 'gzip' in request.accept_encodings
+    if compress:
+        chunks = gzip_chunks(chunks)
+    # Keep the request (and its database session) alive while the body streams
+    response = Response(stream_with_context(chunks), mimetype='text/csv')
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+def export_filename(name):
+    return f'{name}_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+
+def format_timestamp(value, fmt='%Y-%m-%d %H:%M:%S'):
+    return value.strftime(fmt) if value else ''
+
+class ExportLimitError(Exception):
+    """Raised when a new export job would exceed the concurrency limits"""
+
+class ExportJobStore:
+    """Export job records in a SQLite file beside the artifacts in the instance folder.
+
+    Kept out of the main database so a worker can record progress while its
+    own export query still holds a read cursor open there, and shared by every
+    worker on the host so status polls can land on any of them.
+    """
+
+    ACTIVE = ('queued', 'running')
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS export_job ("
+                " id TEXT PRIMARY KEY, user_id INTEGER NOT NULL, entity TEXT NOT NULL,"
+                " format TEXT NOT NULL, filters TEXT NOT NULL, status TEXT NOT NULL,"
+                " rows_written INTEGER NOT NULL DEFAULT 0, total_rows INTEGER, size INTEGER, error TEXT,"
+                " created_at REAL NOT NULL, updated_at REAL NOT NULL,"
+                " started_at REAL, finished_at REAL, expires_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_export_job_user_id ON export_job (user_id, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_export_job_status ON export_job (status)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create(self, job_id, user_id, entity, fmt, filters, user_limit, active_limit):
+        """Insert a queued job, checking the limits in the same write transaction"""
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                user_active, active = conn.execute(
+                    "SELECT COALESCE(SUM(user_id = ?), 0), COUNT(*) FROM export_job WHERE status IN (?, ?)",
+                    (user_id,) + self.ACTIVE
+                ).fetchone()
+                if user_active >= user_limit:
+                    raise ExportLimitError(f'You already have {user_active} exports in progress')
+                if active >= active_limit:
+                    raise ExportLimitError('Too many exports in progress, try again shortly')
+                now = time.time()
+                conn.execute(
+                    "INSERT INTO export_job (id, user_id, entity, format, filters, status, created_at, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, 'queued', ?, ?)",
+                    (job_id, user_id, entity, fmt, json.dumps(filters), now, now)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def update(self, job_id, **fields):
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(f"UPDATE export_job SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+        finally:
+            conn.close()
+
+    def get(self, job_id):
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT * FROM export_job WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+
+    def for_user(self, user_id, limit=20):
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT * FROM export_job WHERE user_id = ? ORDER BY created_at DESC LIMIT ?", (user_id, limit)
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def sweep(self, now, stale_before, forget_before):
+        """Expire finished jobs past expires_at, fail active jobs whose worker
+        stopped reporting, and forget old records. Returns the expired job ids."""
+        conn = self._connect()
+        try:
+            with conn:
+                expired = [row['id'] for row in conn.execute(
+                    "SELECT id FROM export_job WHERE status = 'done' AND expires_at < ?", (now,)
+                )]
+                conn.execute("UPDATE export_job SET status = 'expired', updated_at = ? WHERE status = 'done' AND expires_at < ?", (now, now))
+                conn.execute(
+                    "UPDATE export_job SET status = 'failed', error = 'Export worker stopped before finishing', updated_at = ?"
+                    " WHERE status IN (?, ?) AND updated_at < ?",
+                    (now,) + self.ACTIVE + (stale_before,)
+                )
+                conn.execute("DELETE FROM export_job WHERE status NOT IN (?, ?) AND updated_at < ?", self.ACTIVE + (forget_before,))
+            return expired
+        finally:
+            conn.close()
+
+class ExportJobManager:
+    """Runs exports in a bounded worker pool and writes each to a file in the instance folder.
+
+    specs maps an entity name to a function taking the filters and returning
+    (header, query, to_row), the same triple the streaming export routes use.
+    Limits on jobs per user and jobs in flight are enforced across workers
+    through the shared store; the pool size bounds the database connections
+    and CPU one worker spends on exports.
+    """
+
+    FORMATS = {'csv': ('csv', 'text/csv'), 'csv.gz': ('csv.gz', 'application/gzip')}
+
+    def __init__(self, directory, specs, max_workers=2, user_limit=2, active_limit=8,
+                 ttl_seconds=24 * 3600, stale_seconds=30 * 60, history_seconds=7 * 24 * 3600):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.specs = specs
+        self.max_workers = max_workers
+        self.user_limit = user_limit
+        self.active_limit = active_limit
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.history_seconds = history_seconds
+        self.store = ExportJobStore(os.path.join(directory, 'jobs.db'))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='export')
+            return self._executor
+
+    def artifact_path(self, job_id, fmt):
+        return os.path.join(self.directory, f'{job_id}.{self.FORMATS[fmt][0]}')
+
+    def sweep(self):
+        now = time.time()
+        for job_id in self.store.sweep(now, now - self.stale_seconds, now - self.history_seconds):
+            for fmt in self.FORMATS:
+                path = self.artifact_path(job_id, fmt)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def submit(self, user_id, entity, fmt, filters):
+        """Queue an export and return its id; raises ExportLimitError when over a limit"""
+        self.sweep()
+        job_id = uuid.uuid4().hex
+        self.store.create(job_id, user_id, entity, fmt, filters, self.user_limit, self.active_limit)
+        self._pool().submit(self._run, job_id, entity, fmt, filters)
+        return job_id
+
+    def _run(self, job_id, entity, fmt, filters):
+        path = self.artifact_path(job_id, fmt)
+        partial = path + '.part'
+        try:
+            with app.app_context():
+                self.store.update(job_id, status='running', started_at=time.time())
+                header, query, to_row = self.specs[entity](filters)
+                self.store.update(job_id, total_rows=query.order_by(None).count())
+                written = 0
+
+                def rows():
+                    nonlocal written
+                    for row in export_rows(query, to_row):
+                        yield row
+                        written += 1
+                        if written % EXPORT_BATCH_SIZE == 0:
+                            self.store.update(job_id, rows_written=written)
+
+                chunks = csv_chunks(header, rows())
+                if fmt == 'csv.gz':
+                    chunks = gzip_chunks(chunks)
+                with open(partial, 'wb') as artifact:
+                    for chunk in chunks:
+                        artifact.write(chunk)
+            # Publish the finished file in one step, so a download never sees half of it
+            os.replace(partial, path)
+            finished = time.time()
+            self.store.update(job_id, status='done', rows_written=written, size=os.path.getsize(path),
+                              finished_at=finished, expires_at=finished + self.ttl_seconds)
+        except Exception as e:
+            if os.path.exists(partial):
+                os.remove(partial)
+            self.store.update(job_id, status='failed', error=str(e), finished_at=time.time())
+
+class LocalEventBackend:
+    """Keeps published events in this process only (single worker, development)"""
+
+    def __init__(self, buffer_size=500):
+        self._events = deque(maxlen=buffer_size)
+        self._next_id = 1
+        self._condition = threading.Condition()
+
+    def publish_many(self, payloads):
+        with self._condition:
+            for payload in payloads:
+                self._events.append((self._next_id, payload))
+                self._next_id += 1
+            self._condition.notify_all()
+
+    def latest_id(self):
+        with self._condition:
+            return self._next_id - 1
+
+    def oldest_id(self):
+        with self._condition:
+            return self._events[0][0] if self._events else self._next_id
+
+    def read(self, after_id, timeout):
+        with self._condition:
+            if self._next_id - 1 <= after_id:
+                self._condition.wait(timeout)
+            return [(event_id, payload) for event_id, payload in self._events if event_id > after_id]
+
+class SQLiteEventBackend:
+    """Shares published events between the workers on one host through a notify table.
+
+    Every worker appends to and polls the same SQLite file, so event ids are
+    global and a client can resume on any worker with Last-Event-ID.
+    """
+
+    def __init__(self, path, buffer_size=500, poll_interval=1.0):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.poll_interval = poll_interval
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS event (id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def publish_many(self, payloads):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany("INSERT INTO event (payload) VALUES (?)", [(json.dumps(p),) for p in payloads])
+                conn.execute("DELETE FROM event WHERE id <= (SELECT MAX(id) FROM event) - ?", (self.buffer_size,))
+        finally:
+            conn.close()
+
+    def latest_id(self):
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM event").fetchone()[0]
+        finally:
+            conn.close()
+
+    def oldest_id(self):
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COALESCE(MIN(id), 0) FROM event").fetchone()[0]
+        finally:
+            conn.close()
+
+    def read(self, after_id, timeout):
+        deadline = time.monotonic() + timeout
+        conn = self._connect()
+        try:
+            while True:
+                rows = conn.execute("SELECT id, payload FROM event WHERE id > ? ORDER BY id", (after_id,)).fetchall()
+                if rows or time.monotonic() >= deadline:
+                    return [(event_id, json.loads(payload)) for event_id, payload in rows]
+                time.sleep(self.poll_interval)
+        finally:
+            conn.close()
+
+class EventHub:
+    """Pub/sub hub for server-sent events with a replay buffer and a per-worker connection cap"""
+
+    def __init__(self, backend, max_connections=20, heartbeat_seconds=15, max_stream_seconds=300):
+        self.backend = backend
+        self.max_connections = max_connections
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_stream_seconds = max_stream_seconds
+        self._connections = 0
+        self._lock = threading.Lock()
+
+    def publish(self, payloads):
+        if payloads:
+            self.backend.publish_many(payloads)
+
+    def try_connect(self):
+        with self._lock:
+            if self._connections >= self.max_connections:
+                return False
+            self._connections += 1
+            return True
+
+    def disconnect(self):
+        with self._lock:
+            self._connections -= 1
+
+    def listen(self, last_event_id=None):
+        """Yield (event_id, payload) pairs, or (None, None) when a heartbeat is due.
+
+        A client resuming from an id older than the replay buffer gets a single
+        ('reset', None) so it knows to reload its full state.
+        """
+        if last_event_id is None:
+            cursor = self.backend.latest_id()
+        else:
+            cursor = last_event_id
+            latest_id = self.backend.latest_id()
+            if cursor < self.backend.oldest_id() - 1 or cursor > latest_id:
+                yield 'reset', None
+                cursor = latest_id
+
+        deadline = time.monotonic() + self.max_stream_seconds
+        while time.monotonic() < deadline:
+            events = self.backend.read(cursor, self.heartbeat_seconds)
+            if not events:
+                yield None, None
+                continue
+            for event_id, payload in events:
+                cursor = event_id
+                yield event_id, payload
+
+# Server-sent events need a process that outlives the request. A Vercel
+# function is frozen once its response is sent and caps how long one may run,
+# so there the stream is off and the dashboard polls instead.
+LIVE_UPDATES = not os.environ.get('VERCEL')
+
+def create_event_backend():
+    """The backend named by EVENT_HUB_BACKEND, 'local' or 'sqlite'.
+
+    With more than one worker (WEB_CONCURRENCY > 1) the default is 'sqlite',
+    so an event published in one worker reaches streams held by the others.
+    Every open stream occupies a worker thread for up to max_stream_seconds,
+    so serve it from a threaded or async worker class (gunicorn gthread or
+    gevent); a sync worker holding a stream serves nothing else.
+    """
+    buffer_size = int(os.environ.get('EVENT_BUFFER_SIZE', 500))
+    default = 'sqlite' if LIVE_UPDATES and int(os.environ.get('WEB_CONCURRENCY', 1)) > 1 else 'local'
+    if os.environ.get('EVENT_HUB_BACKEND', default) == 'sqlite':
+        os.makedirs(app.instance_path, exist_ok=True)
+        return SQLiteEventBackend(os.path.join(app.instance_path, 'events.db'), buffer_size=buffer_size)
+    return LocalEventBackend(buffer_size=buffer_size)
+
+bed_event_hub = EventHub(
+    create_event_backend(),
+    max_connections=int(os.environ.get('SSE_MAX_CONNECTIONS', 20))
+)
+
+def bed_event_payload(bed):
+    return {'bed_id': bed.id, 'status': bed.status, 'patient_id': bed.patient_id, 'ward_id': bed.ward_id}
+
+@event.listens_for(Session, 'after_flush')
+def _collect_bed_events(session, flush_context):
+    bed_events = session.info.setdefault('bed_events', [])
+    for obj in session.new:
+        if isinstance(obj, Bed):
+            bed_events.append(bed_event_payload(obj))
+    for obj in session.dirty:
+        if isinstance(obj, Bed):
+            state = inspect(obj)
+            if any(state.attrs[key].history.has_changes() for key in ('status', 'patient_id', 'ward_id')):
+                bed_events.append(bed_event_payload(obj))
+    for obj in session.deleted:
+        if isinstance(obj, Bed):
+            bed_events.append(dict(bed_event_payload(obj), status='deleted', patient_id=None))
+
+@event.listens_for(Session, 'after_commit')
+def _publish_bed_events(session):
+    bed_event_hub.publish(session.info.pop('bed_events', None))
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_bed_events(session):
+    session.info.pop('bed_events', None)
+
+FeedEntry = namedtuple('FeedEntry', 'id user_id user_name user_role action target timestamp')
+
+class ActivityFeed:
+    """Ring buffer of the most recent activity log entries, user name and role resolved.
+
+    Entries committed by this process are appended as they commit. Entries
+    committed by other workers are picked up on read, gated on the
+    activity_log data version (bumped as each writing transaction commits),
+    so an idle feed costs one version lookup. When the version moved, the feed
+    re-reads every row above the highest id it has read back, less a trailing
+    window of rescan ids: ids are handed out at INSERT, not at commit, so a
+    row can commit after a higher id was already synced. Rows are merged by
+    id.
+    """
+
+    def __init__(self, size=200, rescan=100):
+        self.size = size
+        self.rescan = rescan
+        self._entries = deque(maxlen=size)
+        self._users = {}
+        self._synced_id = 0
+        self._synced_version = None
+        self._stale = True
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _query():
+        return db.session.query(ActivityLog, User.name, User.role).join(User)
+
+    @staticmethod
+    def _entries_from(rows):
+        return [
+            FeedEntry(activity.id, activity.user_id, name, role, activity.action, activity.target, activity.timestamp)
+            for activity, name, role in rows
+        ]
+
+    def load(self):
+        version = get_data_versions(db.session, ['activity_log'])
+        rows = self._query().order_by(ActivityLog.id.desc()).limit(self.size).all()
+        entries = self._entries_from(reversed(rows))
+        with self._lock:
+            self._entries = deque(entries, maxlen=self.size)
+            self._users = {entry.user_id: (entry.user_name, entry.user_role) for entry in entries}
+            self._synced_id = entries[-1].id if entries else 0
+            self._synced_version = version
+            self._stale = False
+
+    def resolve_user(self, connection, user_id):
+        with self._lock:
+            cached = self._users.get(user_id)
+        if cached is None:
+            row = connection.execute(select(User.name, User.role).where(User.id == user_id)).first()
+            cached = (row.name, row.role) if row else ('Unknown', 'staff')
+            with self._lock:
+                self._users[user_id] = cached
+        return cached
+
+    def append(self, entries):
+        entries = sorted(entries)
+        if not entries:
+            return
+        with self._lock:
+            if not self._entries or entries[0].id > self._entries[-1].id:
+                self._entries.extend(entries)
+            else:
+                # Committed out of id order, or read back again by a rescan; merge by id
+                merged = {e.id: e for e in self._entries}
+                merged.update((entry.id, entry) for entry in entries)
+                self._entries = deque(sorted(merged.values())[-self.size:], maxlen=self.size)
+
+    def mark_stale(self):
+        with self._lock:
+            self._stale = True
+
+    def _sync(self):
+        if self._stale:
+            self.load()
+            return
+        # Read before the rows, so a commit landing in between triggers another pass
+        version = get_data_versions(db.session, ['activity_log'])
+        with self._lock:
+            if version == self._synced_version:
+                return
+            synced_id = self._synced_id
+        rows = self._query().filter(ActivityLog.id > synced_id - self.rescan).order_by(ActivityLog.id).limit(
+            self.size + self.rescan
+        ).all()
+        if len(rows) >= self.size + self.rescan:
+            self.load()
+            return
+        if rows:
+            self.append(self._entries_from(rows))
+        with self._lock:
+            self._synced_id = max(self._synced_id, rows[-1][0].id if rows else 0)
+            self._synced_version = version
+
+    def latest(self, limit):
+        self._sync()
+        with self._lock:
+            return list(reversed(self._entries))[:limit]
+
+    def after(self, after_id, limit):
+        """The oldest limit entries newer than after_id, oldest first, and whether more follow.
+
+        A cursor older than the buffer's first entry is served from the table,
+        so a client that fell far behind still receives every row in order.
+        """
+        self._sync()
+        with self._lock:
+            covered = bool(self._entries) and self._entries[0].id <= after_id
+            if covered:
+                entries = [entry for entry in self._entries if entry.id > after_id][:limit + 1]
+        if not covered:
+            rows = self._query().filter(ActivityLog.id > after_id).order_by(ActivityLog.id).limit(limit + 1).all()
+            entries = self._entries_from(rows)
+        return entries[:limit], len(entries) > limit
+
+activity_feed = ActivityFeed(size=int(os.environ.get('ACTIVITY_FEED_SIZE', 200)),
+                             rescan=int(os.environ.get('ACTIVITY_FEED_RESCAN', 100)))
+
+def utc_naive(value):
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value and value.tzinfo else value
+
+@event.listens_for(Session, 'after_flush')
+def _collect_feed_entries(session, flush_context):
+    for obj in session.new:
+        if isinstance(obj, ActivityLog):
+            name, role = activity_feed.resolve_user(session.connection(), obj.user_id)
+            session.info.setdefault('feed_entries', []).append(
+                FeedEntry(obj.id, obj.user_id, name, role, obj.action, obj.target, utc_naive(obj.timestamp))
+            )
+    # Renamed or removed users invalidate the names already in the buffer
+    if any(isinstance(obj, User) for obj in list(session.dirty) + list(session.deleted)):
+        session.info['feed_stale'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _append_feed_entries(session):
+    entries = session.info.pop('feed_entries', None)
+    if entries:
+        activity_feed.append(entries)
+    if session.info.pop('feed_stale', False):
+        activity_feed.mark_stale()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_feed_entries(session):
+    session.info.pop('feed_entries', None)
+    session.info.pop('feed_stale', None)
+
+# Call init_db only in local development. Password hashing workers re-import
+# the main script as __mp_main__ (and with it this module) while still
+# bootstrapping, which multiprocessing flags as _inheriting; they must not
+# touch the database.
+bootstrapping_worker = getattr(multiprocessing.current_process(), '_inheriting', False)
+if not os.environ.get('VERCEL') and not bootstrapping_worker:
     init_db()
 
 # Database initialization route for Vercel
@@ -234,22 +1157,20 @@ def admin_dashboard():
         return redirect(url_for('login'))
     
     # Get dashboard statistics
-    total_beds = Bed.query.count()
-    occupied_beds = Bed.query.filter_by(status='occupied').count()
-    available_beds = Bed.query.filter_by(status='empty').count()
-    reserved_beds = Bed.query.filter_by(status='reserved').count()
-    maintenance_beds = Bed.query.filter_by(status='maintenance').count()
+    bed_counts = summarize_bed_counts(get_bed_occupancy())
+    total_beds = bed_counts['total']
+    occupied_beds = bed_counts['occupied']
+    available_beds = bed_counts['empty']
+    reserved_beds = bed_counts['reserved']
+    maintenance_beds = bed_counts['maintenance']
     
     total_patients = Patient.query.filter_by(discharged_on=None).count()
     
     oxygen = Oxygen.query.first()
     oxygen_stock = oxygen.cylinders_in_stock if oxygen else 0
     
-    # Get bed data for table
-    beds = db.session.query(Bed, Ward, Patient).join(Ward).outerjoin(Patient).all()
-    
     # Get recent activities
-    recent_activities = ActivityLog.query.join(User).order_by(ActivityLog.timestamp.desc()).limit(10).all()
+    recent_activities = activity_feed.latest(10)
     
     return render_template('admin/dashboard.html',
                          total_beds=total_beds,
@@ -259,21 +1180,91 @@ def admin_dashboard():
                          maintenance_beds=maintenance_beds,
                          total_patients=total_patients,
                          oxygen_stock=oxygen_stock,
-                         beds=beds,
-                         recent_activities=recent_activities)
+                         recent_activities=recent_activities,
+                         live_updates=LIVE_UPDATES)
 
 @app.route('/staff/dashboard')
 def staff_dashboard():
     if 'user_id' not in session or session['user_role'] != 'staff':
         return redirect(url_for('login'))
     
-    # Get beds assigned to this staff member (for now, show all)
-    beds = db.session.query(Bed, Ward, Patient).join(Ward).outerjoin(Patient).all()
+    # Bed totals come from the counters; the bed table loads its rows from /api/beds/board
+    bed_counts = summarize_bed_counts(get_bed_occupancy())
     
     # Get oxygen info
     oxygen = Oxygen.query.first()
     
-    return render_template('staff/dashboard.html', beds=beds, oxygen=oxygen)
+    return render_template('staff/dashboard.html', bed_counts=bed_counts, oxygen=oxygen)
+
+# Patient portal pages all read from one cached per-patient summary. It holds
+# plain column values rather than ORM instances, so it can outlive the
+# session that built it; the time-window filters are applied per request.
+patient_summary_cache = VersionedCache(maxsize=int(os.environ.get('PATIENT_SUMMARY_CACHE_SIZE', 1024)))
+
+def row_values(obj):
+    return {column.key: getattr(obj, column.key) for column in obj.__table__.columns}
+
+def build_patient_summary(patient_id):
+    """Patient, bed/ward, records, medications and appointments for one patient, in four queries"""
+    row = db.session.query(Patient, Bed, Ward).outerjoin(
+        Bed, db.and_(Bed.patient_id == Patient.id, Bed.status == 'occupied')
+    ).outerjoin(
+        Ward, Ward.id == Bed.ward_id
+    ).filter(Patient.id == patient_id).first()
+    if row is None:
+        return None
+    
+    patient, bed, ward = row
+    ward_info = None
+    if bed and ward:
+        ward_info = {
+            'name': ward.name,
+            'type': ward.type,
+            'bed_number': bed.bed_number
+        }
+    
+    medical_records = MedicalRecord.query.filter_by(patient_id=patient_id).order_by(MedicalRecord.created_at.desc()).all()
+    medications = Medication.query.filter_by(patient_id=patient_id).order_by(Medication.created_at.desc()).all()
+    appointments = Appointment.query.filter_by(patient_id=patient_id).order_by(Appointment.scheduled_time).all()
+    
+    return {
+        'patient': row_values(patient),
+        'ward_info': ward_info,
+        'medical_records': [row_values(record) for record in medical_records],
+        'medications': [row_values(medication) for medication in medications],
+        'appointments': [row_values(appointment) for appointment in appointments]
+    }
+
+def load_patient_summary(patient_id):
+    """Serve a patient's summary from cache until one of their rows is written"""
+    versions = get_data_versions(db.session, [patient_version_key(patient_id)])
+    return patient_summary_cache.get_or_build(patient_id, versions, lambda: build_patient_summary(patient_id))
+
+def current_patient_summary():
+    """Return (user, summary) for the logged-in patient; summary is None without a patient record"""
+    user = User.query.get(session['user_id'])
+    if not user or not user.patient_id:
+        return user, None
+    return user, load_patient_summary(user.patient_id)
+
+def newest_first(rows, key):
+    """Sort row values by a datetime column, newest first and missing values last"""
+    return sorted(rows, key=lambda row: (row[key] is not None, row[key] or datetime.min), reverse=True)
+
+def days_admitted_for(patient):
+    if not patient['admitted_on'] or patient['discharged_on']:
+        return 0
+    # Ensure both datetimes are timezone-aware
+    now_utc = datetime.now(timezone.utc)
+    admitted_on = patient['admitted_on']
+    admitted_on_utc = admitted_on.replace(tzinfo=timezone.utc) if admitted_on.tzinfo is None else admitted_on
+    return (now_utc - admitted_on_utc).days
+
+def upcoming_appointments_for(summary, now):
+    return [
+        appointment for appointment in summary['appointments']
+        if utc_naive(appointment['scheduled_time']) >= now and appointment['status'] == 'scheduled'
+    ]
 
 @app.route('/patient/dashboard')
 def patient_dashboard():
@@ -281,107 +1272,73 @@ def patient_dashboard():
         return redirect(url_for('login'))
     
     # Get current user and their patient record
-    user = User.query.get(session['user_id'])
+    user, summary = current_patient_summary()
     if not user.patient_id:
         flash('No patient record found for your account', 'error')
         return redirect(url_for('login'))
     
-    patient = Patient.query.get(user.patient_id)
-    if not patient:
+    if summary is None:
         flash('Patient record not found', 'error')
         return redirect(url_for('login'))
     
-    # Get current bed assignment
-    current_bed = Bed.query.filter_by(patient_id=patient.id, status='occupied').first()
-    ward_info = None
-    if current_bed:
-        ward_info = {
-            'name': current_bed.ward.name,
-            'type': current_bed.ward.type,
-            'bed_number': current_bed.bed_number
-        }
-    
-    # Get medical records
-    medical_records = MedicalRecord.query.filter_by(patient_id=patient.id).order_by(MedicalRecord.created_at.desc()).all()
+    now = utc_naive(datetime.now(timezone.utc))
+    thirty_days_ago = now - timedelta(days=30)
     
     # Get current medications
-    current_medications = Medication.query.filter_by(patient_id=patient.id, status='active').order_by(Medication.created_at.desc()).all()
+    current_medications = [m for m in summary['medications'] if m['status'] == 'active']
     
     # Get completed medications (last 30 days)
-    from datetime import timedelta
-    thirty_days_ago = datetime.now(timezone.utc) - timedelta(days=30)
-    recent_medications = Medication.query.filter(
-        Medication.patient_id == patient.id,
-        Medication.status.in_(['completed', 'discontinued']),
-        Medication.updated_at >= thirty_days_ago
-    ).order_by(Medication.updated_at.desc()).all()
-    
-    # Get upcoming appointments
-    upcoming_appointments = Appointment.query.filter(
-        Appointment.patient_id == patient.id,
-        Appointment.scheduled_time >= datetime.now(timezone.utc),
-        Appointment.status == 'scheduled'
-    ).order_by(Appointment.scheduled_time).all()
+    recent_medications = newest_first([
+        m for m in summary['medications']
+        if m['status'] in ('completed', 'discontinued') and m['updated_at'] and utc_naive(m['updated_at']) >= thirty_days_ago
+    ], 'updated_at')
     
     # Get recent appointments (last 30 days)
-    recent_appointments = Appointment.query.filter(
-        Appointment.patient_id == patient.id,
-        Appointment.scheduled_time >= thirty_days_ago,
-        Appointment.status.in_(['completed', 'cancelled'])
-    ).order_by(Appointment.scheduled_time.desc()).all()
-    
-    # Calculate days admitted
-    days_admitted = 0
-    if patient.admitted_on and not patient.discharged_on:
-        # Ensure both datetimes are timezone-aware
-        now_utc = datetime.now(timezone.utc)
-        admitted_on_utc = patient.admitted_on.replace(tzinfo=timezone.utc) if patient.admitted_on.tzinfo is None else patient.admitted_on
-        days_admitted = (now_utc - admitted_on_utc).days
+    recent_appointments = newest_first([
+        a for a in summary['appointments']
+        if utc_naive(a['scheduled_time']) >= thirty_days_ago and a['status'] in ('completed', 'cancelled')
+    ], 'scheduled_time')
     
     return render_template('patient/dashboard.html',
-                         patient=patient,
-                         ward_info=ward_info,
-                         medical_records=medical_records,
+                         patient=summary['patient'],
+                         ward_info=summary['ward_info'],
+                         medical_records=summary['medical_records'],
                          current_medications=current_medications,
                          recent_medications=recent_medications,
-                         upcoming_appointments=upcoming_appointments,
+                         upcoming_appointments=upcoming_appointments_for(summary, now),
                          recent_appointments=recent_appointments,
-                         days_admitted=days_admitted)
+                         days_admitted=days_admitted_for(summary['patient']))
 
 @app.route('/patient/medical-records')
 def patient_medical_records():
     if 'user_id' not in session or session['user_role'] != 'patient':
         return redirect(url_for('login'))
     
-    user = User.query.get(session['user_id'])
-    if not user.patient_id:
+    user, summary = current_patient_summary()
+    if summary is None:
         flash('No patient record found', 'error')
         return redirect(url_for('login'))
     
-    patient = Patient.query.get(user.patient_id)
-    medical_records = MedicalRecord.query.filter_by(patient_id=patient.id).order_by(MedicalRecord.created_at.desc()).all()
-    
-    return render_template('patient/medical_records.html', patient=patient, medical_records=medical_records)
+    return render_template('patient/medical_records.html', patient=summary['patient'], medical_records=summary['medical_records'])
 
 @app.route('/patient/medications')
 def patient_medications():
     if 'user_id' not in session or session['user_role'] != 'patient':
         return redirect(url_for('login'))
     
-    user = User.query.get(session['user_id'])
-    if not user.patient_id:
+    user, summary = current_patient_summary()
+    if summary is None:
         flash('No patient record found', 'error')
         return redirect(url_for('login'))
     
-    patient = Patient.query.get(user.patient_id)
-    
-    # Get all medications
-    current_medications = Medication.query.filter_by(patient_id=patient.id, status='active').order_by(Medication.created_at.desc()).all()
-    completed_medications = Medication.query.filter_by(patient_id=patient.id, status='completed').order_by(Medication.updated_at.desc()).all()
-    discontinued_medications = Medication.query.filter_by(patient_id=patient.id, status='discontinued').order_by(Medication.updated_at.desc()).all()
+    # Split medications by status
+    medications = summary['medications']
+    current_medications = [m for m in medications if m['status'] == 'active']
+    completed_medications = newest_first([m for m in medications if m['status'] == 'completed'], 'updated_at')
+    discontinued_medications = newest_first([m for m in medications if m['status'] == 'discontinued'], 'updated_at')
     
     return render_template('patient/medications.html', 
-                         patient=patient,
+                         patient=summary['patient'],
                          current_medications=current_medications,
                          completed_medications=completed_medications,
                          discontinued_medications=discontinued_medications)
@@ -391,28 +1348,21 @@ def patient_appointments():
     if 'user_id' not in session or session['user_role'] != 'patient':
         return redirect(url_for('login'))
     
-    user = User.query.get(session['user_id'])
-    if not user.patient_id:
+    user, summary = current_patient_summary()
+    if summary is None:
         flash('No patient record found', 'error')
         return redirect(url_for('login'))
     
-    patient = Patient.query.get(user.patient_id)
-    
-    # Get appointments
-    upcoming_appointments = Appointment.query.filter(
-        Appointment.patient_id == patient.id,
-        Appointment.scheduled_time >= datetime.now(timezone.utc),
-        Appointment.status == 'scheduled'
-    ).order_by(Appointment.scheduled_time).all()
-    
-    past_appointments = Appointment.query.filter(
-        Appointment.patient_id == patient.id,
-        Appointment.scheduled_time < datetime.now(timezone.utc)
-    ).order_by(Appointment.scheduled_time.desc()).all()
+    # Split appointments around now
+    now = utc_naive(datetime.now(timezone.utc))
+    past_appointments = newest_first(
+        [a for a in summary['appointments'] if utc_naive(a['scheduled_time']) < now],
+        'scheduled_time'
+    )
     
     return render_template('patient/appointments.html',
-                         patient=patient,
-                         upcoming_appointments=upcoming_appointments,
+                         patient=summary['patient'],
+                         upcoming_appointments=upcoming_appointments_for(summary, now),
                          past_appointments=past_appointments)
 
 @app.route('/patient/profile')
@@ -420,41 +1370,24 @@ def patient_profile():
     if 'user_id' not in session or session['user_role'] != 'patient':
         return redirect(url_for('login'))
     
-    user = User.query.get(session['user_id'])
-    if not user.patient_id:
+    user, summary = current_patient_summary()
+    if summary is None:
         flash('No patient record found', 'error')
         return redirect(url_for('login'))
     
-    patient = Patient.query.get(user.patient_id)
-    
-    # Get current bed assignment
-    current_bed = Bed.query.filter_by(patient_id=patient.id, status='occupied').first()
-    ward_info = None
-    if current_bed:
-        ward_info = {
-            'name': current_bed.ward.name,
-            'type': current_bed.ward.type,
-            'bed_number': current_bed.bed_number
-        }
-    
-    # Calculate days admitted and account age
-    days_admitted = 0
-    if patient.admitted_on and not patient.discharged_on:
-        # Ensure both datetimes are timezone-aware
-        now_utc = datetime.now(timezone.utc)
-        admitted_on_utc = patient.admitted_on.replace(tzinfo=timezone.utc) if patient.admitted_on.tzinfo is None else patient.admitted_on
-        days_admitted = (now_utc - admitted_on_utc).days
-    
     # Handle timezone for user.created_at
     now_utc = datetime.now(timezone.utc)
     created_at_utc = user.created_at.replace(tzinfo=timezone.utc) if user.created_at.tzinfo is None else user.created_at
     account_age_days = (now_utc - created_at_utc).days
     
     return render_template('patient/profile.html', 
-                         patient=patient, 
-                         ward_info=ward_info, 
+                         patient=summary['patient'], 
+                         ward_info=summary['ward_info'], 
                          user=user,
-                         days_admitted=days_admitted,
+                         medical_records=summary['medical_records'],
+                         medications=summary['medications'],
+                         appointments=summary['appointments'],
+                         days_admitted=days_admitted_for(summary['patient']),
                          account_age_days=account_age_days)
 
 # API Routes for Patient Dashboard
@@ -463,37 +1396,88 @@ def patient_dashboard_stats():
     if 'user_id' not in session or session['user_role'] != 'patient':
         return jsonify({'error': 'Unauthorized'}), 401
     
-    user = User.query.get(session['user_id'])
-    if not user.patient_id:
+    user, summary = current_patient_summary()
+    if summary is None:
         return jsonify({'error': 'No patient record found'}), 404
     
-    patient = Patient.query.get(user.patient_id)
-    
-    # Get counts
-    current_medications_count = Medication.query.filter_by(patient_id=patient.id, status='active').count()
-    medical_records_count = MedicalRecord.query.filter_by(patient_id=patient.id).count()
-    upcoming_appointments_count = Appointment.query.filter(
-        Appointment.patient_id == patient.id,
-        Appointment.scheduled_time >= datetime.now(timezone.utc),
-        Appointment.status == 'scheduled'
-    ).count()
-    
-    # Calculate days admitted
-    days_admitted = 0
-    if patient.admitted_on and not patient.discharged_on:
-        # Ensure both datetimes are timezone-aware
-        now_utc = datetime.now(timezone.utc)
-        admitted_on_utc = patient.admitted_on.replace(tzinfo=timezone.utc) if patient.admitted_on.tzinfo is None else patient.admitted_on
-        days_admitted = (now_utc - admitted_on_utc).days
-    
+    now = utc_naive(datetime.now(timezone.utc))
     return jsonify({
-        'current_medications': current_medications_count,
-        'medical_records': medical_records_count,
-        'upcoming_appointments': upcoming_appointments_count,
-        'days_admitted': days_admitted
+        'current_medications': len([m for m in summary['medications'] if m['status'] == 'active']),
+        'medical_records': len(summary['medical_records']),
+        'upcoming_appointments': len(upcoming_appointments_for(summary, now)),
+        'days_admitted': days_admitted_for(summary['patient'])
     })
 
 # Admin route to create patient accounts
+# Account provisioning: passwords are hashed across a process pool (see
+# passwords.py), and accounts are validated with one IN query per check and
+# written with a single multi-row INSERT.
+PROVISION_IN_CHUNK = 500  # keeps IN lists under SQLite's bound parameter limit
+
+def read_csv_rows(file):
+    """Stream-parse an uploaded CSV, yielding (row number, row) with row 1 the header"""
+    text = io.TextIOWrapper(file.stream, encoding='utf-8-sig', newline='')
+    try:
+        yield from enumerate(csv.DictReader(text), start=2)
+    finally:
+        text.detach()
+
+def existing_values(column, values):
+    """The subset of values already present in column, in one IN query per chunk"""
+    values = list(set(values))
+    found = set()
+    for start in range(0, len(values), PROVISION_IN_CHUNK):
+        found.update(db.session.scalars(select(column).where(column.in_(values[start:start + PROVISION_IN_CHUNK]))))
+    return found
+
+def provision_accounts(accounts):
+    """Validate and insert user accounts in bulk, within the caller's transaction.
+
+    accounts is a list of (key, fields); fields holds name, email, role and
+    password, plus patient_id for patient accounts. Returns (created, errors):
+    created lists (key, user_id, fields) and errors lists (key, message), both
+    in input order. The caller commits.
+    """
+    errors = []
+    emails = existing_values(User.email, [fields['email'] for _, fields in accounts])
+    patient_ids = [fields['patient_id'] for _, fields in accounts if fields.get('patient_id') is not None]
+    known_patients = existing_values(Patient.id, patient_ids)
+    linked_patients = existing_values(User.patient_id, patient_ids)
+
+    accepted = []
+    for key, fields in accounts:
+        patient_id = fields.get('patient_id')
+        if fields['email'] in emails:
+            errors.append((key, f'Email "{fields["email"]}" already exists'))
+        elif patient_id is not None and patient_id not in known_patients:
+            errors.append((key, f'Patient {patient_id} not found'))
+        elif patient_id is not None and patient_id in linked_patients:
+            errors.append((key, 'Patient already has an account'))
+        else:
+            # Later rows repeating an email or patient from this batch are rejected too
+            emails.add(fields['email'])
+            if patient_id is not None:
+                linked_patients.add(patient_id)
+            accepted.append((key, fields))
+    if not accepted:
+        return [], errors
+
+    hashes = hash_passwords([fields['password'] for _, fields in accepted])
+    now = datetime.now(timezone.utc)
+    user_ids = db.session.scalars(
+        insert(User.__table__).returning(User.__table__.c.id, sort_by_parameter_order=True),
+        [{
+            'name': fields['name'],
+            'email': fields['email'],
+            'role': fields['role'],
+            'password_hash': password_hash,
+            'patient_id': fields.get('patient_id'),
+            'created_at': now
+        } for (_, fields), password_hash in zip(accepted, hashes)]
+    ).all()
+    record_bulk_write(db.session, 'user', user_ids)
+    return [(key, user_id, fields) for (key, fields), user_id in zip(accepted, user_ids)], errors
+
 @app.route('/admin/create-patient-account', methods=['POST'])
 def create_patient_account():
     if 'user_id' not in session or session['user_role'] != 'admin':
@@ -510,28 +1494,20 @@ def create_patient_account():
         if not patient:
             return jsonify({'error': 'Patient not found'}), 404
         
-        # Check if patient already has an account
-        existing_user = User.query.filter_by(patient_id=patient_id).first()
-        if existing_user:
-            return jsonify({'error': 'Patient already has an account'}), 400
-        
-        # Check if email is already used
-        existing_email = User.query.filter_by(email=email).first()
-        if existing_email:
-            return jsonify({'error': 'Email already in use'}), 400
+        if not email:
+            return jsonify({'error': 'Email is required'}), 400
         
         # Create user account
-        new_user = User(
-            name=patient.name,
-            email=email,
-            password_hash=generate_password_hash(password),
-            role='patient',
-            patient_id=patient_id,
-            created_at=datetime.now(timezone.utc)
-        )
-        
-        db.session.add(new_user)
-        db.session.commit()
+        _, errors = provision_accounts([(patient.id, {
+            'name': patient.name,
+            'email': email,
+            'role': 'patient',
+            'password': password,
+            'patient_id': patient.id
+        })])
+        if errors:
+            db.session.rollback()
+            return jsonify({'error': errors[0][1]}), 400
         
         # Log activity
         log = ActivityLog(
@@ -561,28 +1537,8 @@ def staff_ward_status():
     
     # Get ward statistics
     wards = Ward.query.all()
-    ward_stats = []
-    
-    for ward in wards:
-        total_beds = Bed.query.filter_by(ward_id=ward.id).count()
-        occupied_beds = Bed.query.filter_by(ward_id=ward.id, status='occupied').count()
-        available_beds = Bed.query.filter_by(ward_id=ward.id, status='empty').count()
-        cleaning_beds = Bed.query.filter_by(ward_id=ward.id, status='cleaning').count()
-        maintenance_beds = Bed.query.filter_by(ward_id=ward.id, status='maintenance').count()
-        reserved_beds = Bed.query.filter_by(ward_id=ward.id, status='reserved').count()
-        
-        occupancy_rate = (occupied_beds / total_beds * 100) if total_beds > 0 else 0
-        
-        ward_stats.append({
-            'ward': ward,
-            'total_beds': total_beds,
-            'occupied_beds': occupied_beds,
-            'available_beds': available_beds,
-            'cleaning_beds': cleaning_beds,
-            'maintenance_beds': maintenance_beds,
-            'reserved_beds': reserved_beds,
-            'occupancy_rate': occupancy_rate
-        })
+    occupancy = get_bed_occupancy()
+    ward_stats = [ward_status_stat(ward, occupancy) for ward in wards]
     
     # Get recent bed changes in the last 24 hours
     from datetime import timedelta
@@ -593,6 +1549,36 @@ def staff_ward_status():
     
     return render_template('staff/ward_status.html', ward_stats=ward_stats, recent_changes=recent_changes)
 
+def ward_status_stat(ward, occupancy):
+    """One ward card on the staff ward status page"""
+    bed_counts = summarize_bed_counts(occupancy, ward.id)
+    total_beds = bed_counts['total']
+    occupied_beds = bed_counts['occupied']
+    return {
+        'ward': ward,
+        'total_beds': total_beds,
+        'occupied_beds': occupied_beds,
+        'available_beds': bed_counts['empty'],
+        'cleaning_beds': bed_counts['cleaning'],
+        'maintenance_beds': bed_counts['maintenance'],
+        'reserved_beds': bed_counts['reserved'],
+        'occupancy_rate': (occupied_beds / total_beds * 100) if total_beds > 0 else 0
+    }
+
+def ward_card_stats(ward):
+    """A ward card's numbers keyed by the card's data-stat names"""
+    stat = ward_status_stat(ward, get_bed_occupancy())
+    prefix = f'ward-{ward.id}'
+    return {
+        f'{prefix}-total': stat['total_beds'],
+        f'{prefix}-available': stat['available_beds'],
+        f'{prefix}-occupied': stat['occupied_beds'],
+        f'{prefix}-reserved': stat['reserved_beds'],
+        f'{prefix}-cleaning': stat['cleaning_beds'],
+        f'{prefix}-maintenance': stat['maintenance_beds'],
+        f'{prefix}-occupancy': f"{stat['occupancy_rate']:.1f}%"
+    }
+
 @app.route('/staff/oxygen-status')
 def staff_oxygen_status():
     if 'user_id' not in session or session['user_role'] != 'staff':
@@ -626,62 +1612,228 @@ def staff_oxygen_status():
                          usage_percentage=usage_percentage,
                          days_to_refill=days_to_refill)
 
+PATIENT_PAGE_SIZE = 50
+PATIENT_PAGE_LIMIT = 200
+# Roster sort keys, each backed by a column index on patient plus a partial one
+# over the active census (SQLite index entries end in the rowid, so they also
+# serve the id tie-breaker): name -> (column, cursor value parser)
+PATIENT_SORTS = {
+    'admitted_on': (Patient.admitted_on, datetime.fromisoformat),
+    'age': (Patient.age, int),
+    'gender': (Patient.gender, str),
+    # Compared as 0/1: SQL expressions only allow equality tests against True/False
+    'oxygen_required': (Patient.oxygen_required, int)
+}
+
+def is_id_list(value):
+    """True for a JSON list of integer ids; bools, strings and floats don't count"""
+    return isinstance(value, list) and all(isinstance(item, int) and not isinstance(item, bool) for item in value)
+
+def parse_flag(value):
+    """Read a 1/0 or true/false query parameter; None when it is absent"""
+    if value in (None, ''):
+        return None
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise ValueError(f'Invalid flag: {value}')
+
+def filter_patients(query, args):
+    """Apply the roster filters: ward_id, oxygen_required, age_min/age_max, gender,
+    admitted_from/admitted_to (YYYY-MM-DD, inclusive), has_active_medication,
+    discharged (0 = active only, the default; 1 = discharged only; all) and search (name)"""
+    discharged = args.get('discharged', '0')
+    if discharged != 'all':
+        if parse_flag(discharged):
+            query = query.filter(Patient.discharged_on.isnot(None))
+        else:
+            query = query.filter(Patient.discharged_on.is_(None))
+    if args.get('ward_id'):
+        ward_patients = select(Bed.patient_id).where(
+            Bed.ward_id == int(args['ward_id']),
+            Bed.status == 'occupied',
+            Bed.patient_id.isnot(None)
+        )
+        query = query.filter(Patient.id.in_(ward_patients))
+    oxygen_required = parse_flag(args.get('oxygen_required'))
+    if oxygen_required is not None:
+        query = query.filter(Patient.oxygen_required == oxygen_required)
+    if args.get('age_min'):
+        query = query.filter(Patient.age >= int(args['age_min']))
+    if args.get('age_max'):
+        query = query.filter(Patient.age <= int(args['age_max']))
+    if args.get('gender'):
+        query = query.filter(Patient.gender == args['gender'])
+    if args.get('admitted_from'):
+        query = query.filter(Patient.admitted_on >= datetime.strptime(args['admitted_from'], '%Y-%m-%d'))
+    if args.get('admitted_to'):
+        query = query.filter(Patient.admitted_on < datetime.strptime(args['admitted_to'], '%Y-%m-%d') + timedelta(days=1))
+    has_active_medication = parse_flag(args.get('has_active_medication'))
+    if has_active_medication is not None:
+        active_medication = select(Medication.id).where(
+            Medication.patient_id == Patient.id,
+            Medication.status == 'active'
+        ).exists()
+        query = query.filter(active_medication if has_active_medication else ~active_medication)
+    if args.get('search'):
+        query = query.filter(Patient.name.ilike(f"%{args['search']}%"))
+    return query
+
+def patient_page(query, sort='admitted_on', order='desc', cursor=None, limit=PATIENT_PAGE_SIZE):
+    """One page of the roster in the requested sort order, keyed on (sort value, id)"""
+    if sort not in PATIENT_SORTS:
+        raise ValueError(f'Unknown sort: {sort}')
+    if order not in ('asc', 'desc'):
+        raise ValueError(f'Unknown sort order: {order}')
+    sort_column, parse_value = PATIENT_SORTS[sort]
+    limit = max(1, min(limit, PATIENT_PAGE_LIMIT))
+    return keyset_page(query, sort_column, Patient.id, cursor, limit,
+                       descending=order == 'desc', parse_value=parse_value)
+
+def patient_row_template():
+    return 'admin/_patient_row.html' if session['user_role'] == 'admin' else 'staff/_patient_row.html'
+
 @app.route('/staff/patients')
 def staff_patients():
     if 'user_id' not in session or session['user_role'] != 'staff':
         return redirect(url_for('login'))
     
-    # Get all active patients (not discharged)
-    patients = Patient.query.filter(Patient.discharged_on.is_(None)).all()
+    # First page of active patients; further pages and filters go through /api/patients/query
+    patients, next_cursor = patient_page(filter_patients(Patient.query, {}))
     
-    # Get patient details with bed and ward information
-    patient_details = []
-    for patient in patients:
-        # Get current bed
-        current_bed = Bed.query.filter_by(patient_id=patient.id, status='occupied').first()
-        ward_name = current_bed.ward.name if current_bed else 'Not Assigned'
-        bed_number = current_bed.bed_number if current_bed else 'N/A'
-        
-        # Get latest medical record
-        latest_record = MedicalRecord.query.filter_by(patient_id=patient.id).order_by(MedicalRecord.created_at.desc()).first()
-        
-        # Get active medications
-        active_medications = Medication.query.filter_by(patient_id=patient.id, status='active').all()
-        
-        patient_info = {
-            'patient': patient,
-            'ward_name': ward_name,
-            'bed_number': bed_number,
-            'latest_record': latest_record,
-            'active_medications': active_medications,
-            'medication_count': len(active_medications)
-        }
-        patient_details.append(patient_info)
+    return render_template('staff/patients.html',
+                         patient_details=build_patient_details(patients),
+                         next_cursor=next_cursor,
+                         patient_stats=get_patient_stats(),
+                         wards=Ward.query.order_by(Ward.name).all())
+
+@app.route('/api/patients/query')
+def query_patients():
+    if 'user_id' not in session or session['user_role'] not in ('admin', 'staff'):
+        return jsonify({'error': 'Unauthorized'}), 401
     
-    return render_template('staff/patients.html', patient_details=patient_details)
+    try:
+        query = filter_patients(Patient.query, request.args)
+        patients, next_cursor = patient_page(
+            query,
+            sort=request.args.get('sort', 'admitted_on'),
+            order=request.args.get('order', 'desc'),
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', PATIENT_PAGE_SIZE, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    stats = {}
+    if not request.args.get('cursor'):
+        # The filtered count only changes when the filters do, i.e. on the first page
+        stats['matching'] = query.order_by(None).count()
+    
+    return jsonify(row_delta(patient_detail_rows(patient_row_template(), patients),
+                             next_cursor=next_cursor, stats=stats))
+
+BED_BOARD_PAGE_SIZE = 100
+BED_BOARD_PAGE_LIMIT = 500
+
+def bed_board_query():
+    """The bed board as a flat projection of just the columns the bed tables show"""
+    return db.session.query(
+        Bed.id,
+        Bed.bed_number,
+        Bed.status,
+        Bed.updated_at,
+        Ward.id.label('ward_id'),
+        Ward.name.label('ward_name'),
+        Ward.type.label('ward_type'),
+        Patient.id.label('patient_id'),
+        Patient.name.label('patient_name'),
+        Patient.age.label('patient_age'),
+        Patient.gender.label('patient_gender')
+    ).join(Ward, Bed.ward_id == Ward.id).outerjoin(Patient, Bed.patient_id == Patient.id)
+
+def filter_bed_board(query, args):
+    """Apply ward_id, status (comma separated) and search (bed number, ward or patient name) filters"""
+    if args.get('ward_id'):
+        query = query.filter(Bed.ward_id == int(args['ward_id']))
+    if args.get('status'):
+        query = query.filter(Bed.status.in_(args['status'].split(',')))
+    if args.get('search'):
+        pattern = f"%{args['search']}%"
+        query = query.filter(db.or_(
+            Bed.bed_number.ilike(pattern),
+            Ward.name.ilike(pattern),
+            Patient.name.ilike(pattern)
+        ))
+    return query
+
+def bed_board_window(query, offset=0, cursor=None, limit=BED_BOARD_PAGE_SIZE):
+    """One window of the board in (ward, bed) order, by keyset cursor or by offset.
+
+    Cursors suit sequential paging; offsets let a virtual table jump straight
+    to whatever part of the board is scrolled into view. Returns
+    (rows, next_cursor).
+    """
+    limit = max(1, min(limit, BED_BOARD_PAGE_LIMIT))
+    if cursor or not offset:
+        return keyset_page(query, Bed.ward_id, Bed.id, cursor, limit, descending=False, parse_value=int)
+    if offset < 0:
+        raise ValueError('offset must not be negative')
+    rows = query.order_by(Bed.ward_id, Bed.id).offset(offset).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].ward_id, rows[-1].id)
+    return rows, next_cursor
+
+def bed_board_row(row):
+    values = dict(row._mapping)
+    values['updated_at'] = row.updated_at.strftime('%Y-%m-%d %H:%M') if row.updated_at else None
+    return values
 
 @app.route('/admin/bed-management')
 def admin_bed_management():
     if 'user_id' not in session or session['user_role'] != 'admin':
         return redirect(url_for('login'))
     
-    # Get all beds with ward and patient information
-    beds = db.session.query(Bed, Ward, Patient).join(Ward).outerjoin(Patient).all()
-    
-    # Get ward statistics for filtering
+    # Bed rows are not rendered here; the table pulls visible windows from /api/beds/board
     wards = Ward.query.all()
     
-    # Get bed statistics
-    bed_stats = {
-        'total': Bed.query.count(),
-        'available': Bed.query.filter_by(status='empty').count(),
-        'occupied': Bed.query.filter_by(status='occupied').count(),
-        'reserved': Bed.query.filter_by(status='reserved').count(),
-        'cleaning': Bed.query.filter_by(status='cleaning').count(),
-        'maintenance': Bed.query.filter_by(status='maintenance').count()
+    # Get bed statistics
+    bed_stats = get_bed_stats()
+    
+    return render_template('admin/bed_management.html', wards=wards, bed_stats=bed_stats)
+
+@app.route('/api/beds/board')
+def bed_board():
+    if 'user_id' not in session or session['user_role'] not in ('admin', 'staff'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    etag, _ = get_validator('bed_board', ['bed', 'ward', 'patient'], sorted(request.args.items(multi=True)))
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+    
+    try:
+        query = filter_bed_board(bed_board_query(), request.args)
+        offset = request.args.get('offset', 0, type=int)
+        rows, next_cursor = bed_board_window(
+            query,
+            offset=offset,
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', BED_BOARD_PAGE_SIZE, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    payload = {
+        'rows': [bed_board_row(row) for row in rows],
+        'offset': offset,
+        'next_cursor': next_cursor
     }
-    
-    return render_template('admin/bed_management.html', beds=beds, wards=wards, bed_stats=bed_stats)
+    if not request.args.get('cursor'):
+        # Offset windows need the full size to lay out the scrollbar
+        payload['total'] = query.order_by(None).count()
+    return with_etag(jsonify(payload), etag)
 
 @app.route('/admin/oxygen-management')
 def admin_oxygen_management():
@@ -723,14 +1875,10 @@ def admin_staff_management():
     staff_members = User.query.all()
     
     # Get staff activity statistics
-    staff_activities = db.session.query(User, ActivityLog).join(ActivityLog).order_by(ActivityLog.timestamp.desc()).limit(50).all()
+    staff_activities = activity_feed.latest(50)
     
     # Calculate staff statistics
-    staff_stats = {
-        'total_staff': User.query.filter_by(role='staff').count(),
-        'total_admin': User.query.filter_by(role='admin').count(),
-        'active_today': len(set([activity.user_id for user, activity in staff_activities if activity.timestamp.date() == datetime.now(timezone.utc).date()]))
-    }
+    staff_stats = get_staff_stats(staff_activities)
     
     return render_template('admin/staff_management.html', 
                          staff_members=staff_members, 
@@ -742,88 +1890,173 @@ def admin_patients():
     if 'user_id' not in session or session['user_role'] != 'admin':
         return redirect(url_for('login'))
     
-    # Get all active patients (not discharged) - same as staff panel
-    patients = Patient.query.filter(Patient.discharged_on.is_(None)).all()
-    
-    # Get patient details with bed and ward information - same structure as staff panel
-    patient_details = []
-    for patient in patients:
-        # Get current bed
-        current_bed = Bed.query.filter_by(patient_id=patient.id, status='occupied').first()
-        ward_name = current_bed.ward.name if current_bed else 'Not Assigned'
-        bed_number = current_bed.bed_number if current_bed else 'N/A'
-        
-        # Get latest medical record
-        latest_record = MedicalRecord.query.filter_by(patient_id=patient.id).order_by(MedicalRecord.created_at.desc()).first()
-        
-        # Get active medications
-        active_medications = Medication.query.filter_by(patient_id=patient.id, status='active').all()
-        
-        patient_info = {
-            'patient': patient,
-            'ward_name': ward_name,
-            'bed_number': bed_number,
-            'latest_record': latest_record,
-            'active_medications': active_medications,
-            'medication_count': len(active_medications)
-        }
-        patient_details.append(patient_info)
-    
-    # Also get discharged patients for admin overview
-    discharged_patients = Patient.query.filter(Patient.discharged_on.isnot(None)).all()
-    
-    # Calculate patient statistics
-    patient_stats = {
-        'total_active': len(patient_details),
-        'total_discharged': len(discharged_patients),
-        'oxygen_required': len([p for p in patient_details if p['patient'].oxygen_required]),
-        'total_medications': sum([p['medication_count'] for p in patient_details])
-    }
+    # First page of active patients - same as staff panel; the rest loads through /api/patients/query
+    patients, next_cursor = patient_page(filter_patients(Patient.query, {}))
     
     return render_template('admin/patients.html', 
-                         patient_details=patient_details,
-                         discharged_patients=discharged_patients,
-                         patient_stats=patient_stats)
+                         patient_details=build_patient_details(patients),
+                         next_cursor=next_cursor,
+                         patient_stats=get_patient_stats(),
+                         wards=Ward.query.order_by(Ward.name).all())
 
 # Enhanced Features Routes
+INVENTORY_PAGE_SIZE = 50
+INVENTORY_PAGE_LIMIT = 200
+INVENTORY_ALERT_LIMIT = 5
+# Items without an expiry date sort after every dated one
+INVENTORY_NO_EXPIRY = datetime(9999, 12, 31)
+# Grid sort orders: name -> (sort expression, cursor value parser, row's sort value)
+INVENTORY_SORTS = {
+    'item_name': (Inventory.item_name, str, lambda item: item.item_name),
+    'current_stock': (Inventory.current_stock, int, lambda item: item.current_stock),
+    'expiry_date': (db.func.coalesce(Inventory.expiry_date, INVENTORY_NO_EXPIRY), datetime.fromisoformat,
+                    lambda item: item.expiry_date or INVENTORY_NO_EXPIRY),
+    'created_at': (Inventory.created_at, datetime.fromisoformat, lambda item: item.created_at)
+}
+
+def filter_inventory(query, args):
+    """Apply the grid filters: category, supplier, search (item name), low_stock=1,
+    expired=1 and expiring_within=<days>"""
+    now = utc_naive(datetime.now(timezone.utc))
+    if args.get('category'):
+        query = query.filter(Inventory.category == args['category'])
+    if args.get('supplier'):
+        query = query.filter(Inventory.supplier == args['supplier'])
+    if args.get('search'):
+        query = query.filter(Inventory.item_name.ilike(f"%{args['search']}%"))
+    if args.get('low_stock') in ('1', 'true'):
+        query = query.filter(Inventory.current_stock <= Inventory.minimum_stock)
+    if args.get('expired') in ('1', 'true'):
+        query = query.filter(Inventory.expiry_date < now)
+    if args.get('expiring_within'):
+        days = int(args['expiring_within'])
+        if days < 0:
+            raise ValueError('expiring_within must be a number of days')
+        query = query.filter(Inventory.expiry_date >= now, Inventory.expiry_date < now + timedelta(days=days))
+    return query
+
+def inventory_page(query, sort='item_name', order='asc', cursor=None, limit=INVENTORY_PAGE_SIZE):
+    """One page of inventory items in the requested sort order, keyed on (sort value, id)"""
+    if sort not in INVENTORY_SORTS:
+        raise ValueError(f'Unknown sort: {sort}')
+    if order not in ('asc', 'desc'):
+        raise ValueError(f'Unknown sort order: {order}')
+    sort_column, parse_value, sort_value = INVENTORY_SORTS[sort]
+    limit = max(1, min(limit, INVENTORY_PAGE_LIMIT))
+    return keyset_page(query, sort_column, Inventory.id, cursor, limit,
+                       row_key=lambda item: (sort_value(item), item.id),
+                       descending=order == 'desc', parse_value=parse_value)
+
+def get_inventory_stats():
+    """Summary tile counts from one aggregate query, cached until inventory is written"""
+    def build():
+        now = utc_naive(datetime.now(timezone.utc))
+        total, low_stock, expired, categories = db.session.query(
+            db.func.count(Inventory.id),
+            db.func.sum(db.case((Inventory.current_stock <= Inventory.minimum_stock, 1), else_=0)),
+            db.func.sum(db.case((Inventory.expiry_date < now, 1), else_=0)),
+            db.func.count(db.distinct(Inventory.category))
+        ).one()
+        return {
+            'total_items': total,
+            'low_stock': low_stock or 0,
+            'expired': expired or 0,
+            'categories': categories
+        }
+    
+    # Expiry dates are whole days, so the expired count only moves at midnight
+    today_key = datetime.now(timezone.utc).date().isoformat()
+    return cached_payload(f'inventory_stats:{today_key}', ['inventory'], build)
+
+def get_inventory_alerts():
+    """The few most urgent low-stock and expired items for the alert panels"""
+    now = utc_naive(datetime.now(timezone.utc))
+    low_stock_items = Inventory.query.filter(
+        Inventory.current_stock <= Inventory.minimum_stock
+    ).order_by(Inventory.current_stock - Inventory.minimum_stock, Inventory.id).limit(INVENTORY_ALERT_LIMIT).all()
+    expired_items = Inventory.query.filter(
+        Inventory.expiry_date < now
+    ).order_by(Inventory.expiry_date, Inventory.id).limit(INVENTORY_ALERT_LIMIT).all()
+    return low_stock_items, expired_items
+
+# Bulk grid actions, each mapping the request body to the SET clause of one UPDATE
+INVENTORY_BULK_UPDATES = {
+    'restock': lambda data: {
+        'current_stock': Inventory.current_stock + int(data.get('additional_stock', 0)),
+        'last_restocked': datetime.now(timezone.utc)
+    },
+    'update_minimum': lambda data: {'minimum_stock': int(data.get('new_minimum', 10))},
+    'update_supplier': lambda data: {'supplier': data.get('new_supplier', '')},
+    'update_cost': lambda data: {'cost_per_unit': float(data.get('new_cost', 0))}
+}
+
+def update_inventory_items(item_ids, values):
+    """Apply values to the given items in one UPDATE ... WHERE id IN (...) and return them.
+
+    RETURNING hands the updated rows back as Inventory objects, so there is
+    no per-item select before or after. Leaves the commit to the caller.
+    """
+    if not item_ids:
+        return []
+    items = db.session.scalars(
+        update(Inventory)
+        .where(Inventory.id.in_(item_ids))
+        .values(values)
+        .returning(Inventory)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    ).all()
+    record_bulk_write(db.session, 'inventory', [item.id for item in items])
+    return sorted(items, key=lambda item: item.id)
+
+def inventory_rows(items):
+    current_time = datetime.now(timezone.utc)
+    return render_rows('admin/_inventory_row.html',
+                       [(item.id, {'item': item, 'current_time': current_time}) for item in items])
+
 @app.route('/admin/inventory')
 def admin_inventory():
     if 'user_id' not in session or session['user_role'] != 'admin':
         return redirect(url_for('login'))
     
-    # Get inventory items
-    inventory_items = Inventory.query.all()
-    
-    # Calculate statistics
-    low_stock_items = [item for item in inventory_items if item.current_stock <= item.minimum_stock]
-    
-    # Handle timezone-aware datetime comparison
-    current_time = datetime.now(timezone.utc)
-    expired_items = []
-    for item in inventory_items:
-        if item.expiry_date:
-            # If expiry_date is timezone-naive, make it timezone-aware
-            if item.expiry_date.tzinfo is None:
-                expiry_aware = item.expiry_date.replace(tzinfo=timezone.utc)
-            else:
-                expiry_aware = item.expiry_date
-            
-            if expiry_aware < current_time:
-                expired_items.append(item)
-    
-    inventory_stats = {
-        'total_items': len(inventory_items),
-        'low_stock': len(low_stock_items),
-        'expired': len(expired_items),
-        'categories': len(set([item.category for item in inventory_items]))
-    }
+    # First page of the grid; further pages, filters and sorting go through /api/inventory/grid
+    inventory_items, next_cursor = inventory_page(Inventory.query)
+    low_stock_items, expired_items = get_inventory_alerts()
+    suppliers = [supplier for supplier, in db.session.query(Inventory.supplier).filter(
+        Inventory.supplier.isnot(None), Inventory.supplier != ''
+    ).distinct().order_by(Inventory.supplier)]
     
     return render_template('admin/inventory.html', 
                          inventory_items=inventory_items,
-                         inventory_stats=inventory_stats,
+                         next_cursor=next_cursor,
+                         inventory_stats=get_inventory_stats(),
                          low_stock_items=low_stock_items,
                          expired_items=expired_items,
-                         current_time=current_time)
+                         suppliers=suppliers,
+                         current_time=datetime.now(timezone.utc))
+
+@app.route('/api/inventory/grid')
+def inventory_grid():
+    if 'user_id' not in session or session['user_role'] != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        query = filter_inventory(Inventory.query, request.args)
+        items, next_cursor = inventory_page(
+            query,
+            sort=request.args.get('sort', 'item_name'),
+            order=request.args.get('order', 'asc'),
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', INVENTORY_PAGE_SIZE, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    stats = dict(get_inventory_stats())
+    if not request.args.get('cursor'):
+        # The filtered count only changes when the filters do, i.e. on the first page
+        stats['matching'] = query.order_by(None).count()
+    
+    return jsonify(row_delta(inventory_rows(items), next_cursor=next_cursor, stats=stats))
 
 @app.route('/admin/reports')
 def admin_reports():
@@ -864,32 +2097,201 @@ def admin_reports():
                          patient_stats=patient_stats,
                          staff_stats=staff_stats)
 
+NOTIFICATION_PAGE_SIZE = 25
+NOTIFICATION_PAGE_LIMIT = 100
+
+def notification_scope():
+    """Notifications visible to the logged-in user: all for admins, own plus system-wide for staff"""
+    query = Notification.query
+    if session['user_role'] != 'admin':
+        query = query.filter((Notification.user_id == session['user_id']) | (Notification.user_id == None))
+    return query
+
+def filter_notifications(query, args):
+    """Apply the inbox filters: type, priority (comma separated), read=read|unread, since=<ISO time>"""
+    if args.get('type'):
+        query = query.filter(Notification.type == args['type'])
+    if args.get('priority'):
+        query = query.filter(Notification.priority.in_(args['priority'].split(',')))
+    if args.get('read') == 'unread':
+        query = query.filter(Notification.is_read == False)
+    elif args.get('read') == 'read':
+        query = query.filter(Notification.is_read == True)
+    if args.get('since'):
+        query = query.filter(Notification.created_at >= utc_naive(datetime.fromisoformat(args['since'])))
+    return query
+
+def notification_page(query, cursor=None, limit=NOTIFICATION_PAGE_SIZE):
+    """One page of notifications, newest first, keyed on (created_at, id)"""
+    limit = max(1, min(limit, NOTIFICATION_PAGE_LIMIT))
+    return keyset_page(query, Notification.created_at, Notification.id, cursor, limit)
+
+def get_notification_stats():
+    """Inbox summary counts for the logged-in user, cached until a notification is written"""
+    def build():
+        scope = notification_scope()
+        today = utc_naive(datetime.now(timezone.utc)).replace(hour=0, minute=0, second=0, microsecond=0)
+        breakdown = scope.with_entities(
+            Notification.type, Notification.priority, db.func.count(Notification.id)
+        ).group_by(Notification.type, Notification.priority).all()
+        return {
+            'total': sum(count for _, _, count in breakdown),
+            'unread': scope.filter(Notification.is_read == False).count(),
+            'today': scope.filter(Notification.created_at >= today).count(),
+            'critical': sum(count for _, priority, count in breakdown if priority == 'critical'),
+            'high_priority': sum(count for _, priority, count in breakdown if priority in ('high', 'critical')),
+            'info': sum(count for type_, _, count in breakdown if type_ == 'info')
+        }
+    
+    scope_key = 'all' if session['user_role'] == 'admin' else session['user_id']
+    today_key = datetime.now(timezone.utc).date().isoformat()
+    return cached_payload(f'notification_stats:{scope_key}:{today_key}', ['notification'], build)
+
+def notification_template():
+    return 'admin/_notification_item.html' if session['user_role'] == 'admin' else 'staff/_notification_item.html'
+
+def notification_rows(notifications):
+    return render_rows(notification_template(), [(n.id, {'notification': n}) for n in notifications])
+
 @app.route('/admin/notifications')
 def admin_notifications():
     if 'user_id' not in session or session['user_role'] != 'admin':
         return redirect(url_for('login'))
     
-    # Get all notifications
-    notifications = Notification.query.order_by(Notification.created_at.desc()).all()
-    
-    # Get unread count
-    unread_count = Notification.query.filter_by(is_read=False).count()
+    # First page of the inbox; the rest is fetched from /api/notifications on scroll
+    notifications, next_cursor = notification_page(
+        notification_scope().options(db.joinedload(Notification.user))
+    )
+    notification_stats = get_notification_stats()
     
     return render_template('admin/notifications.html',
                          notifications=notifications,
-                         unread_count=unread_count)
+                         next_cursor=next_cursor,
+                         notification_stats=notification_stats,
+                         unread_count=notification_stats['unread'])
+
+MEDICAL_RECORD_PAGE_SIZE = 20
+MEDICAL_RECORD_PAGE_LIMIT = 100
+MEDICAL_RECORD_PREVIEW_LENGTH = 120
+# Large clinical text stays in the database until a record is expanded
+MEDICAL_RECORD_TEXT_COLUMNS = (
+    MedicalRecord.diagnosis,
+    MedicalRecord.treatment,
+    MedicalRecord.medications,
+    MedicalRecord.notes,
+    MedicalRecord.discharge_summary
+)
+
+def medical_record_list_query():
+    """Records of active patients with the text columns deferred and a short diagnosis preview"""
+    return db.session.query(
+        MedicalRecord,
+        Patient,
+        db.func.substr(MedicalRecord.diagnosis, 1, MEDICAL_RECORD_PREVIEW_LENGTH).label('diagnosis_preview')
+    ).join(Patient).filter(
+        Patient.discharged_on == None
+    ).options(
+        # raiseload: a template touching a deferred column fails loudly instead of querying per row
+        *[db.defer(column, raiseload=True) for column in MEDICAL_RECORD_TEXT_COLUMNS],
+        db.load_only(Patient.id, Patient.name, Patient.age, Patient.gender, Patient.oxygen_required)
+    )
+
+def filter_medical_records(query, args):
+    """Apply ward_id, status and date_from/date_to (YYYY-MM-DD, inclusive) filters"""
+    if args.get('ward_id'):
+        ward_patients = select(Bed.patient_id).where(
+            Bed.ward_id == int(args['ward_id']),
+            Bed.patient_id.isnot(None)
+        )
+        query = query.filter(MedicalRecord.patient_id.in_(ward_patients))
+    if args.get('status'):
+        query = query.filter(MedicalRecord.status == args['status'])
+    if args.get('date_from'):
+        query = query.filter(MedicalRecord.created_at >= datetime.strptime(args['date_from'], '%Y-%m-%d'))
+    if args.get('date_to'):
+        query = query.filter(MedicalRecord.created_at < datetime.strptime(args['date_to'], '%Y-%m-%d') + timedelta(days=1))
+    return query
+
+def medical_record_page(query, cursor=None, limit=MEDICAL_RECORD_PAGE_SIZE):
+    limit = max(1, min(limit, MEDICAL_RECORD_PAGE_LIMIT))
+    return keyset_page(query, MedicalRecord.created_at, MedicalRecord.id, cursor, limit,
+                       row_key=lambda row: (row[0].created_at, row[0].id))
+
+def medical_record_rows(records):
+    return render_rows('staff/_medical_record_item.html', [
+        (record.id, {
+            'record': record,
+            'patient': patient,
+            'diagnosis_preview': diagnosis_preview,
+            'preview_length': MEDICAL_RECORD_PREVIEW_LENGTH
+        })
+        for record, patient, diagnosis_preview in records
+    ])
 
 @app.route('/staff/medical-records')
 def staff_medical_records():
     if 'user_id' not in session or session['user_role'] != 'staff':
         return redirect(url_for('login'))
     
-    # Get medical records for active patients
-    records = db.session.query(MedicalRecord, Patient).join(Patient).filter(
-        Patient.discharged_on == None
-    ).order_by(MedicalRecord.created_at.desc()).all()
+    # First page of medical records for active patients; later pages load on scroll
+    query = medical_record_list_query()
+    records, next_cursor = medical_record_page(query)
+    
+    return render_template('staff/medical_records.html',
+                         records=records,
+                         next_cursor=next_cursor,
+                         total_records=query.order_by(None).count(),
+                         preview_length=MEDICAL_RECORD_PREVIEW_LENGTH,
+                         wards=Ward.query.order_by(Ward.name).all())
+
+@app.route('/api/medical-records')
+def list_medical_records():
+    if 'user_id' not in session or session['user_role'] not in ('admin', 'staff'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        query = filter_medical_records(medical_record_list_query(), request.args)
+        records, next_cursor = medical_record_page(
+            query,
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', MEDICAL_RECORD_PAGE_SIZE, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(row_delta(
+        medical_record_rows(records),
+        next_cursor=next_cursor,
+        stats={'total': query.order_by(None).count()}
+    ))
+
+@app.route('/api/medical-records/<int:record_id>')
+def get_medical_record(record_id):
+    if 'user_id' not in session or session['user_role'] not in ('admin', 'staff'):
+        return jsonify({'error': 'Unauthorized'}), 401
     
-    return render_template('staff/medical_records.html', records=records)
+    etag, _ = get_validator(f'medical_record:{record_id}', ['medical_record'])
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+    
+    record = MedicalRecord.query.get(record_id)
+    if not record:
+        return jsonify({'error': 'Medical record not found'}), 404
+    
+    return with_etag(jsonify({
+        'id': record.id,
+        'patient_id': record.patient_id,
+        'doctor_name': record.doctor_name,
+        'status': record.status,
+        'diagnosis': record.diagnosis,
+        'treatment': record.treatment,
+        'medications': record.medications,
+        'notes': record.notes,
+        'discharge_summary': record.discharge_summary,
+        'discharge_date': record.discharge_date.isoformat() if record.discharge_date else None,
+        'created_at': record.created_at.isoformat() if record.created_at else None,
+        'updated_at': record.updated_at.isoformat() if record.updated_at else None
+    }), etag)
 
 @app.route('/staff/shifts')
 def staff_shifts():
@@ -915,19 +2317,38 @@ def staff_notifications():
     if 'user_id' not in session or session['user_role'] != 'staff':
         return redirect(url_for('login'))
     
-    # Get notifications for current user and system-wide
-    notifications = Notification.query.filter(
-        (Notification.user_id == session['user_id']) | (Notification.user_id == None)
-    ).order_by(Notification.created_at.desc()).all()
-    
-    unread_count = Notification.query.filter(
-        ((Notification.user_id == session['user_id']) | (Notification.user_id == None)),
-        Notification.is_read == False
-    ).count()
+    # First page of notifications for current user and system-wide
+    notifications, next_cursor = notification_page(notification_scope())
+    notification_stats = get_notification_stats()
     
     return render_template('staff/notifications.html',
                          notifications=notifications,
-                         unread_count=unread_count)
+                         next_cursor=next_cursor,
+                         notification_stats=notification_stats,
+                         unread_count=notification_stats['unread'])
+
+@app.route('/api/notifications')
+def list_notifications():
+    if 'user_id' not in session or session['user_role'] not in ('admin', 'staff'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        query = filter_notifications(notification_scope(), request.args)
+        if session['user_role'] == 'admin':
+            query = query.options(db.joinedload(Notification.user))
+        notifications, next_cursor = notification_page(
+            query,
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', NOTIFICATION_PAGE_SIZE, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(row_delta(
+        notification_rows(notifications),
+        next_cursor=next_cursor,
+        stats=get_notification_stats()
+    ))
 
 # API Routes for enhanced features
 @app.route('/api/create_emergency_alert', methods=['POST'])
@@ -968,7 +2389,11 @@ def mark_notification_read(notification_id):
     if notification:
         notification.is_read = True
         db.session.commit()
-        return jsonify({'success': True})
+        return jsonify(row_delta(
+            notification_rows([notification]),
+            success=True,
+            stats=get_notification_stats()
+        ))
     
     return jsonify({'error': 'Notification not found'}), 404
 
@@ -1006,104 +2431,89 @@ def add_inventory_item():
     db.session.add(log)
     db.session.commit()
     
-    return jsonify({'success': True, 'item_id': item.id})
+    return jsonify(row_delta(inventory_rows([item]), success=True, item_id=item.id, stats=get_inventory_stats()))
 
 @app.route('/api/inventory/bulk_update', methods=['POST'])
 def bulk_update_inventory():
     if 'user_id' not in session or session['user_role'] != 'admin':
         return jsonify({'error': 'Unauthorized'}), 401
     
-    data = request.json
-    item_ids = data.get('item_ids', [])
+    data = request.json or {}
     update_type = data.get('update_type')
+    if update_type not in INVENTORY_BULK_UPDATES:
+        return jsonify({'error': f"update_type must be one of: {', '.join(INVENTORY_BULK_UPDATES)}"}), 400
     
-    updated_count = 0
-    
-    for item_id in item_ids:
-        item = Inventory.query.get(item_id)
-        if item:
-            if update_type == 'restock':
-                additional_stock = int(data.get('additional_stock', 0))
-                item.current_stock += additional_stock
-                item.last_restocked = datetime.now(timezone.utc)
-            elif update_type == 'update_minimum':
-                new_minimum = int(data.get('new_minimum', 10))
-                item.minimum_stock = new_minimum
-            elif update_type == 'update_supplier':
-                new_supplier = data.get('new_supplier', '')
-                item.supplier = new_supplier
-            elif update_type == 'update_cost':
-                new_cost = float(data.get('new_cost', 0))
-                item.cost_per_unit = new_cost
-            
-            updated_count += 1
-    
-    db.session.commit()
+    try:
+        item_ids = [int(item_id) for item_id in data.get('item_ids', [])]
+        values = INVENTORY_BULK_UPDATES[update_type](data)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid item ids or update value'}), 400
     
-    # Log activity
-    log = ActivityLog(
-        user_id=session['user_id'],
-        action='bulk_update_inventory',
-        target=f"Bulk updated {updated_count} inventory items ({update_type})",
-        timestamp=datetime.now(timezone.utc)
-    )
-    db.session.add(log)
-    db.session.commit()
+    try:
+        # One UPDATE ... WHERE id IN (...) for the whole selection
+        updated_items = update_inventory_items(item_ids, values)
+        updated_count = len(updated_items)
+        
+        # Log activity
+        log = ActivityLog(
+            user_id=session['user_id'],
+            action='bulk_update_inventory',
+            target=f"Bulk updated {updated_count} inventory items ({update_type})",
+            timestamp=datetime.now(timezone.utc)
+        )
+        db.session.add(log)
+        db.session.commit()
+        
+        return jsonify(row_delta(inventory_rows(updated_items), success=True,
+                                 updated_count=updated_count, stats=get_inventory_stats()))
     
-    return jsonify({'success': True, 'updated_count': updated_count})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def inventory_export(args):
+    """(header, query, to_row) of the inventory export; takes the grid filters"""
+    query = filter_inventory(db.session.query(
+        Inventory.id, Inventory.item_name, Inventory.category, Inventory.current_stock,
+        Inventory.minimum_stock, Inventory.unit, Inventory.cost_per_unit, Inventory.supplier,
+        Inventory.expiry_date, Inventory.last_restocked
+    ), args).order_by(Inventory.id)
+    header = ['ID', 'Item Name', 'Category', 'Current Stock', 'Minimum Stock',
+              'Unit', 'Cost Per Unit', 'Supplier', 'Expiry Date', 'Last Restocked']
+    return header, query, lambda item: [
+        item.id,
+        item.item_name,
+        item.category,
+        item.current_stock,
+        item.minimum_stock,
+        item.unit,
+        item.cost_per_unit or 0,
+        item.supplier or '',
+        format_timestamp(item.expiry_date, '%Y-%m-%d'),
+        format_timestamp(item.last_restocked, '%Y-%m-%d %H:%M')
+    ]
 
 @app.route('/api/inventory/export')
 def export_inventory():
     if 'user_id' not in session or session['user_role'] != 'admin':
         return jsonify({'error': 'Unauthorized'}), 401
     
-    inventory_items = Inventory.query.all()
-    
-    # Create CSV data
-    import io
-    import csv
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['ID', 'Item Name', 'Category', 'Current Stock', 'Minimum Stock', 
-                     'Unit', 'Cost Per Unit', 'Supplier', 'Expiry Date', 'Last Restocked'])
-    
-    # Write data
-    for item in inventory_items:
-        writer.writerow([
-            item.id,
-            item.item_name,
-            item.category,
-            item.current_stock,
-            item.minimum_stock,
-            item.unit,
-            item.cost_per_unit or 0,
-            item.supplier or '',
-            item.expiry_date.strftime('%Y-%m-%d') if item.expiry_date else '',
-            item.last_restocked.strftime('%Y-%m-%d %H:%M') if item.last_restocked else ''
-        ])
+    try:
+        header, query, to_row = inventory_export(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     # Log activity
     log = ActivityLog(
         user_id=session['user_id'],
         action='export_inventory',
-        target=f"Exported {len(inventory_items)} inventory items",
+        target=f"Exported {query.order_by(None).count()} inventory items",
         timestamp=datetime.now(timezone.utc)
     )
     db.session.add(log)
     db.session.commit()
     
-    # Return CSV data
-    csv_data = output.getvalue()
-    output.close()
-    
-    return jsonify({
-        'success': True,
-        'csv_data': csv_data,
-        'filename': f'inventory_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-    })
+    return csv_export_response(export_filename('inventory'), header, export_rows(query, to_row))
 
 @app.route('/api/inventory/report')
 def generate_inventory_report():
@@ -1192,16 +2602,18 @@ def restock_inventory_item(item_id):
     if 'user_id' not in session or session['user_role'] != 'admin':
         return jsonify({'error': 'Unauthorized'}), 401
     
-    data = request.json
-    quantity = int(data.get('quantity', 0))
+    data = request.json or {}
+    try:
+        quantity = int(data.get('quantity', 0))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Quantity must be a whole number'}), 400
     
-    item = Inventory.query.get(item_id)
-    if not item:
+    # Atomic increment: concurrent restocks of the same item both count
+    updated = update_inventory_items([item_id], INVENTORY_BULK_UPDATES['restock']({'additional_stock': quantity}))
+    if not updated:
+        db.session.rollback()
         return jsonify({'error': 'Item not found'}), 404
-    
-    item.current_stock += quantity
-    item.last_restocked = datetime.now(timezone.utc)
-    db.session.commit()
+    item = updated[0]
     
     # Log activity
     log = ActivityLog(
@@ -1213,7 +2625,8 @@ def restock_inventory_item(item_id):
     db.session.add(log)
     db.session.commit()
     
-    return jsonify({'success': True, 'new_stock': item.current_stock})
+    return jsonify(row_delta(inventory_rows([item]), success=True,
+                             new_stock=item.current_stock, stats=get_inventory_stats()))
 
 @app.route('/api/update_bed_status', methods=['POST'])
 def update_bed_status():
@@ -1228,29 +2641,29 @@ def update_bed_status():
     if not bed:
         return jsonify({'error': 'Bed not found'}), 404
     
-    old_status = bed.status
-    bed.status = new_status
-    
-    # If status is changing to empty, discharge patient
-    if new_status == 'empty' and bed.patient_id:
-        patient = Patient.query.get(bed.patient_id)
-        if patient:
-            patient.discharged_on = datetime.now(timezone.utc)
-        bed.patient_id = None
+    if new_status not in BED_STATUSES:
+        return jsonify({'error': f"Invalid status. Must be one of: {', '.join(BED_STATUSES)}"}), 400
     
-    db.session.commit()
+    old_status = bed.status
     
-    # Log activity
-    log = ActivityLog(
-        user_id=session['user_id'],
-        action='update_bed_status',
-        target=f'Bed {bed.bed_number} from {old_status} to {new_status}',
-        timestamp=datetime.now(timezone.utc)
-    )
-    db.session.add(log)
-    db.session.commit()
+    try:
+        # If status is changing to empty, discharge patient
+        if new_status == 'empty' and bed.patient_id:
+            patient_id = bed.patient_id
+            update_beds([Bed.id == bed.id], {'status': new_status, 'patient_id': None})
+            discharge_patients([patient_id], session['user_id'])
+        else:
+            bed.status = new_status
+        
+        # Same audit path as discharge_patients, so both rows reach the live feed
+        log_activities(session['user_id'], 'update_bed_status', [f'Bed {bed.bed_number} from {old_status} to {new_status}'])
+        db.session.commit()
+        
+        return jsonify(row_delta(bed_rows([bed.id]), success=True, stats=build_dashboard_stats()))
     
-    return jsonify({'success': True})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/admit_patient', methods=['POST'])
 def admit_patient():
@@ -1293,23 +2706,85 @@ def admit_patient():
     db.session.add(log)
     db.session.commit()
     
-    return jsonify({'success': True})
+    return jsonify(row_delta(bed_rows([bed.id]), success=True, stats=build_dashboard_stats()))
 
 @app.route('/api/dashboard_stats')
 def dashboard_stats():
     if 'user_id' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    total_beds = Bed.query.count()
-    occupied_beds = Bed.query.filter_by(status='occupied').count()
-    available_beds = Bed.query.filter_by(status='empty').count()
+    etag, versions = get_validator('dashboard_stats', ['bed'])
+    if is_not_modified(etag):
+        return not_modified_response(etag)
     
-    return jsonify({
+    payload = response_cache.get_or_build('dashboard_stats', versions, build_dashboard_stats)
+    return with_etag(jsonify(payload), etag)
+
+def build_dashboard_stats():
+    bed_counts = summarize_bed_counts(get_bed_occupancy())
+    total_beds = bed_counts['total']
+    occupied_beds = bed_counts['occupied']
+    available_beds = bed_counts['empty']
+    
+    return {
         'total_beds': total_beds,
         'occupied_beds': occupied_beds,
         'available_beds': available_beds,
         'occupancy_rate': (occupied_beds / total_beds * 100) if total_beds > 0 else 0
+    }
+
+@app.route('/api/stream/beds')
+def stream_beds():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    if not LIVE_UPDATES:
+        return jsonify({'error': 'Live updates are not available on this deployment; poll /api/dashboard_stats'}), 501
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    if not bed_event_hub.try_connect():
+        response = jsonify({'error': 'Too many live connections, retry shortly'})
+        response.headers['Retry-After'] = '10'
+        return response, 503
+    
+    def generate():
+        yield 'retry: 5000\n\n'
+        for event_id, payload in bed_event_hub.listen(last_event_id):
+            if event_id is None:
+                yield ': heartbeat\n\n'
+            elif event_id == 'reset':
+                yield 'event: reset\ndata: {}\n\n'
+            else:
+                yield f'id: {event_id}\nevent: bed\ndata: {json.dumps(payload)}\n\n'
+    
+    released = threading.Lock()
+    
+    def release():
+        # The server closes the response even when the client left before the
+        # generator started, where a finally block in it would never run
+        if released.acquire(blocking=False):
+            bed_event_hub.disconnect()
+    
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
     })
+    response.call_on_close(release)
+    return response
+
+@app.route('/api/cache/stats')
+def response_cache_stats():
+    if 'user_id' not in session or session['user_role'] != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    stats = response_cache.stats()
+    stats['patient_summaries'] = patient_summary_cache.stats()
+    return jsonify(stats)
 
 # Bed Management API Routes
 @app.route('/api/beds/add', methods=['POST'])
@@ -1332,7 +2807,6 @@ def add_bed():
             ward_id=ward_id,
             bed_number=bed_number,
             status='empty',
-            created_at=datetime.now(timezone.utc),
             updated_at=datetime.now(timezone.utc)
         )
         
@@ -1349,12 +2823,92 @@ def add_bed():
         
         db.session.commit()
         
-        return jsonify({'success': True, 'message': f'Bed {bed_number} added successfully'})
+        return jsonify(row_delta(
+            bed_rows([new_bed.id]),
+            success=True,
+            message=f'Bed {bed_number} added successfully',
+            stats=get_bed_stats()
+        ))
     
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def update_beds(criteria, values):
+    """Set-based bed write that keeps the bookkeeping the ORM flush hooks would do.
+
+    The beds matching criteria are read, row-locked, for their current ward,
+    status and patient, then changed by one UPDATE ... WHERE id IN (...)
+    RETURNING id that repeats the criteria. Bed counters, data versions
+    (table, ward and patient scoped), the change log and the bed SSE events
+    (published on commit) are all updated for the beds that changed. Returns
+    those beds' rows as they were before the update; the caller commits.
+    """
+    before = db.session.execute(
+        select(Bed.id, Bed.ward_id, Bed.bed_number, Bed.status, Bed.patient_id)
+        .where(*criteria)
+        .with_for_update()
+    ).all()
+    if not before:
+        return []
+    changed_ids = set(db.session.scalars(
+        update(Bed)
+        .where(Bed.id.in_([bed.id for bed in before]), *criteria)
+        .values(updated_at=datetime.now(timezone.utc), **values)
+        .returning(Bed.id)
+        .execution_options(synchronize_session=False)
+    ))
+    changed = [bed for bed in before if bed.id in changed_ids]
+    record_bed_changes([
+        (bed, values.get('status', bed.status), values.get('patient_id', bed.patient_id)) for bed in changed
+    ])
+    return changed
+
+def record_bed_changes(changes):
+    """Bookkeeping for beds written by Core statements, which skip the flush hooks.
+
+    changes lists (bed row before the write, new status, new patient id); the
+    row needs id, ward_id, status and patient_id. Adjusts the bed counters,
+    bumps the table, ward and patient data versions, records change log
+    entries and queues the bed SSE events for the after_commit publisher.
+    """
+    deltas = defaultdict(int)
+    scoped_names = set()
+    events = []
+    for bed, new_status, new_patient_id in changes:
+        deltas[(bed.ward_id, bed.status or 'empty')] -= 1
+        deltas[(bed.ward_id, new_status or 'empty')] += 1
+        scoped_names.add(ward_version_key(bed.ward_id))
+        scoped_names.update(patient_version_key(patient_id) for patient_id in (bed.patient_id, new_patient_id) if patient_id is not None)
+        events.append({'bed_id': bed.id, 'status': new_status, 'patient_id': new_patient_id, 'ward_id': bed.ward_id})
+    connection = db.session.connection()
+    apply_bed_counter_deltas(connection, deltas)
+    record_bulk_write(db.session, 'bed', [bed.id for bed, _, _ in changes], scoped_names=scoped_names)
+    # Published by the after_commit hook, or dropped on rollback, like flushed bed changes
+    db.session.info.setdefault('bed_events', []).extend(events)
+
+def log_activities(user_id, action, targets):
+    """Insert one activity log row per target with a single multi-row INSERT.
+
+    Core inserts skip the flush hooks, so the feed entries are queued here
+    for _append_feed_entries to publish when the transaction commits.
+    """
+    if not targets:
+        return
+    now = datetime.now(timezone.utc)
+    table = ActivityLog.__table__
+    connection = db.session.connection()
+    activity_ids = db.session.scalars(insert(table).returning(table.c.id, sort_by_parameter_order=True), [
+        {'user_id': user_id, 'action': action, 'target': target, 'timestamp': now}
+        for target in targets
+    ]).all()
+    bump_data_versions(db.session, ['activity_log'])
+    name, role = activity_feed.resolve_user(connection, user_id)
+    db.session.info.setdefault('feed_entries', []).extend(
+        FeedEntry(activity_id, user_id, name, role, action, target, utc_naive(now))
+        for activity_id, target in zip(activity_ids, targets)
+    )
+
 @app.route('/api/beds/bulk-update', methods=['POST'])
 def bulk_update_beds():
     if 'user_id' not in session or session['user_role'] != 'admin':
@@ -1368,76 +2922,59 @@ def bulk_update_beds():
         if not bed_ids or not new_status:
             return jsonify({'error': 'Missing bed IDs or status'}), 400
         
-        # Update beds
-        beds = Bed.query.filter(Bed.id.in_(bed_ids)).all()
-        updated_count = 0
+        if not is_id_list(bed_ids):
+            return jsonify({'error': 'bed_ids must be a list of integer ids'}), 400
         
-        for bed in beds:
-            # Only update if status is different and valid
-            if bed.status != new_status and new_status in ['empty', 'occupied', 'reserved', 'cleaning', 'maintenance']:
-                old_status = bed.status
-                bed.status = new_status
-                bed.updated_at = datetime.now(timezone.utc)
-                
-                # Log activity
-                log = ActivityLog(
-                    user_id=session['user_id'],
-                    action='update',
-                    target=f'bed {bed.bed_number} from {old_status} to {new_status}',
-                    timestamp=datetime.now(timezone.utc)
-                )
-                db.session.add(log)
-                updated_count += 1
+        if new_status not in BED_STATUSES:
+            return jsonify({'error': f"Invalid status. Must be one of: {', '.join(BED_STATUSES)}"}), 400
+        
+        # One conditional UPDATE; beds already in the new status are left alone
+        changed = update_beds([Bed.id.in_(bed_ids), Bed.status != new_status], {'status': new_status})
+        updated_ids = [bed.id for bed in changed]
+        updated_count = len(updated_ids)
+        
+        # Log activity, one audit row per bed in a single executemany
+        log_activities(session['user_id'], 'update', [
+            f'bed {bed.bed_number} from {bed.status} to {new_status}' for bed in changed
+        ])
         
         db.session.commit()
         
-        return jsonify({
-            'success': True, 
-            'message': f'Updated {updated_count} bed(s) to {new_status}',
-            'updated_count': updated_count
-        })
+        return jsonify(row_delta(
+            bed_rows(updated_ids) if updated_ids else [],
+            success=True,
+            message=f'Updated {updated_count} bed(s) to {new_status}',
+            updated_count=updated_count,
+            stats=get_bed_stats()
+        ))
     
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def bed_export(args):
+    """(header, query, to_row) of the bed export; takes the bed board filters"""
+    # Same projection as the bed board: only the exported columns are read
+    query = filter_bed_board(bed_board_query(), args).order_by(Bed.ward_id, Bed.id)
+    header = ['Ward Name', 'Ward Type', 'Bed Number', 'Status', 'Patient Name', 'Patient Age', 'Patient Gender', 'Last Updated']
+    return header, query, lambda bed: [
+        bed.ward_name,
+        bed.ward_type,
+        bed.bed_number,
+        bed.status,
+        bed.patient_name or '',
+        bed.patient_age if bed.patient_id else '',
+        bed.patient_gender or '',
+        format_timestamp(bed.updated_at)
+    ]
+
 @app.route('/api/beds/export')
 def export_beds():
     if 'user_id' not in session or session['user_role'] != 'admin':
         return jsonify({'error': 'Unauthorized'}), 401
     
     try:
-        import csv
-        import io
-        from flask import make_response
-        
-        # Get all beds with ward and patient info
-        beds_data = db.session.query(Bed, Ward, Patient).join(Ward).outerjoin(Patient).all()
-        
-        # Create CSV content
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write headers
-        writer.writerow(['Ward Name', 'Ward Type', 'Bed Number', 'Status', 'Patient Name', 'Patient Age', 'Patient Gender', 'Last Updated'])
-        
-        # Write data
-        for bed, ward, patient in beds_data:
-            writer.writerow([
-                ward.name,
-                ward.type,
-                bed.bed_number,
-                bed.status,
-                patient.name if patient else '',
-                patient.age if patient else '',
-                patient.gender if patient else '',
-                bed.updated_at.strftime('%Y-%m-%d %H:%M:%S')
-            ])
-        
-        # Create response
-        response = make_response(output.getvalue())
-        response.headers['Content-Type'] = 'text/csv'
-        response.headers['Content-Disposition'] = f'attachment; filename=beds_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        header, query, to_row = bed_export(request.args)
         
         # Log activity
         log = ActivityLog(
@@ -1449,9 +2986,12 @@ def export_beds():
         db.session.add(log)
         db.session.commit()
         
-        return response
+        return csv_export_response(export_filename('beds'), header, export_rows(query, to_row))
     
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/beds/report')
@@ -1461,14 +3001,16 @@ def generate_bed_report():
     
     try:
         # Get comprehensive bed statistics
-        total_beds = Bed.query.count()
+        occupancy = get_bed_occupancy()
+        bed_counts = summarize_bed_counts(occupancy)
+        total_beds = bed_counts['total']
         bed_stats = {
             'total': total_beds,
-            'available': Bed.query.filter_by(status='empty').count(),
-            'occupied': Bed.query.filter_by(status='occupied').count(),
-            'reserved': Bed.query.filter_by(status='reserved').count(),
-            'cleaning': Bed.query.filter_by(status='cleaning').count(),
-            'maintenance': Bed.query.filter_by(status='maintenance').count()
+            'available': bed_counts['empty'],
+            'occupied': bed_counts['occupied'],
+            'reserved': bed_counts['reserved'],
+            'cleaning': bed_counts['cleaning'],
+            'maintenance': bed_counts['maintenance']
         }
         
         # Calculate occupancy rate
@@ -1478,8 +3020,9 @@ def generate_bed_report():
         ward_stats = []
         wards = Ward.query.all()
         for ward in wards:
-            ward_beds = Bed.query.filter_by(ward_id=ward.id).count()
-            ward_occupied = Bed.query.filter_by(ward_id=ward.id, status='occupied').count()
+            ward_counts = summarize_bed_counts(occupancy, ward.id)
+            ward_beds = ward_counts['total']
+            ward_occupied = ward_counts['occupied']
             ward_occupancy = (ward_occupied / ward_beds * 100) if ward_beds > 0 else 0
             
             ward_stats.append({
@@ -1547,7 +3090,12 @@ def delete_bed(bed_id):
         
         db.session.commit()
         
-        return jsonify({'success': True, 'message': f'Bed {bed_number} deleted successfully'})
+        return jsonify(row_delta(
+            removed=[bed_id],
+            success=True,
+            message=f'Bed {bed_number} deleted successfully',
+            stats=get_bed_stats()
+        ))
     
     except Exception as e:
         db.session.rollback()
@@ -1597,7 +3145,12 @@ def add_staff():
         
         db.session.commit()
         
-        return jsonify({'success': True, 'message': f'Staff member {name} added successfully'})
+        return jsonify(row_delta(
+            staff_rows([new_staff.id]),
+            success=True,
+            message=f'Staff member {name} added successfully',
+            stats=get_staff_stats(activity_feed.latest(50))
+        ))
     
     except Exception as e:
         db.session.rollback()
@@ -1619,53 +3172,34 @@ def bulk_import_staff():
         if not file.filename.endswith('.csv'):
             return jsonify({'error': 'Only CSV files are allowed'}), 400
         
-        import csv
-        import io
-        
-        # Read CSV content
-        stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-        csv_input = csv.DictReader(stream)
-        
-        added_count = 0
-        errors = []
-        
-        for row_num, row in enumerate(csv_input, start=2):  # Start at 2 because row 1 is header
-            try:
-                name = row.get('name', '').strip()
-                email = row.get('email', '').strip()
-                role = row.get('role', '').strip().lower()
-                password = row.get('password', '').strip()
+        # Parse and validate rows as the upload streams in
+        accounts = []
+        row_errors = []
+        try:
+            for row_num, row in read_csv_rows(file):
+                name = (row.get('name') or '').strip()
+                email = (row.get('email') or '').strip()
+                role = (row.get('role') or '').strip().lower()
+                password = (row.get('password') or '').strip()
                 
                 # Validate required fields
                 if not all([name, email, role, password]):
-                    errors.append(f'Row {row_num}: Missing required fields')
+                    row_errors.append((row_num, 'Missing required fields'))
                     continue
                 
                 # Validate role
                 if role not in ['admin', 'staff']:
-                    errors.append(f'Row {row_num}: Invalid role "{role}". Must be "admin" or "staff"')
-                    continue
-                
-                # Check if email already exists
-                existing_user = User.query.filter_by(email=email).first()
-                if existing_user:
-                    errors.append(f'Row {row_num}: Email "{email}" already exists')
+                    row_errors.append((row_num, f'Invalid role "{role}". Must be "admin" or "staff"'))
                     continue
                 
-                # Create new staff member
-                new_staff = User(
-                    name=name,
-                    email=email,
-                    role=role,
-                    password_hash=generate_password_hash(password),
-                    created_at=datetime.now(timezone.utc)
-                )
-                
-                db.session.add(new_staff)
-                added_count += 1
-                
-            except Exception as e:
-                errors.append(f'Row {row_num}: {str(e)}')
+                accounts.append((row_num, {'name': name, 'email': email, 'role': role, 'password': password}))
+        except (UnicodeDecodeError, csv.Error) as e:
+            return jsonify({'error': f'Could not read CSV: {e}'}), 400
+        
+        # Duplicate emails are checked in one query, passwords hashed in parallel
+        created, provision_errors = provision_accounts(accounts)
+        errors = [f'Row {row_num}: {message}' for row_num, message in sorted(row_errors + provision_errors)]
+        added_count = len(created)
         
         if added_count > 0:
             # Log activity
@@ -1678,52 +3212,41 @@ def bulk_import_staff():
             db.session.add(log)
             db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'message': f'Successfully imported {added_count} staff members',
-            'added_count': added_count,
-            'errors': errors
-        })
+        return jsonify(row_delta(
+            staff_rows([user_id for _, user_id, _ in created]) if created else [],
+            success=True,
+            message=f'Successfully imported {added_count} staff members',
+            added_count=added_count,
+            errors=errors,
+            stats=get_staff_stats(activity_feed.latest(50))
+        ))
     
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def staff_export(args):
+    """(header, query, to_row) of the user export; takes an optional role filter"""
+    query = db.session.query(User.id, User.name, User.email, User.role, User.created_at)
+    if args.get('role'):
+        query = query.filter(User.role == args['role'])
+    header = ['ID', 'Name', 'Email', 'Role', 'Created Date', 'Status']
+    return header, query.order_by(User.id), lambda staff: [
+        staff.id,
+        staff.name,
+        staff.email,
+        staff.role,
+        format_timestamp(staff.created_at),
+        'Active'  # You can add a status field to User model if needed
+    ]
+
 @app.route('/api/staff/export')
 def export_staff():
     if 'user_id' not in session or session['user_role'] != 'admin':
         return jsonify({'error': 'Unauthorized'}), 401
     
     try:
-        import csv
-        import io
-        from flask import make_response
-        
-        # Get all staff members
-        staff_members = User.query.all()
-        
-        # Create CSV content
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write headers
-        writer.writerow(['ID', 'Name', 'Email', 'Role', 'Created Date', 'Status'])
-        
-        # Write data
-        for staff in staff_members:
-            writer.writerow([
-                staff.id,
-                staff.name,
-                staff.email,
-                staff.role,
-                staff.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'Active'  # You can add a status field to User model if needed
-            ])
-        
-        # Create response
-        response = make_response(output.getvalue())
-        response.headers['Content-Type'] = 'text/csv'
-        response.headers['Content-Disposition'] = f'attachment; filename=staff_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        header, query, to_row = staff_export(request.args)
         
         # Log activity
         log = ActivityLog(
@@ -1735,9 +3258,12 @@ def export_staff():
         db.session.add(log)
         db.session.commit()
         
-        return response
+        return csv_export_response(export_filename('staff'), header, export_rows(query, to_row))
     
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/staff/report')
@@ -1850,7 +3376,12 @@ def delete_staff(staff_id):
         
         db.session.commit()
         
-        return jsonify({'success': True, 'message': f'Staff member {staff_name} deleted successfully'})
+        return jsonify(row_delta(
+            removed=[staff_id],
+            success=True,
+            message=f'Staff member {staff_name} deleted successfully',
+            stats=get_staff_stats(activity_feed.latest(50))
+        ))
     
     except Exception as e:
         db.session.rollback()
@@ -1947,12 +3478,292 @@ def admit_new_patient():
         db.session.add(log)
         
         db.session.commit()
-        
-        return jsonify({'success': True, 'message': f'Patient {name} admitted successfully'})
-    
+        
+        return jsonify(row_delta(
+            patient_rows('admin/_patient_row.html', [patient.id]),
+            success=True,
+            message=f'Patient {name} admitted successfully',
+            stats=get_patient_stats()
+        ))
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+BULK_ADMIT_LIMIT = 500
+# Without an explicit ward type, patients on oxygen are placed in these wards first
+BULK_ADMIT_OXYGEN_WARD_TYPES = ('icu', 'emergency')
+BULK_ADMIT_OPTIONAL_FIELDS = ('phone', 'address', 'emergency_contact', 'blood_group', 'allergies', 'medical_history')
+# Rounds of reallocation for beds a concurrent request claimed first
+BULK_ADMIT_CLAIM_ATTEMPTS = 3
+
+def parse_admission(entry, defaults):
+    """Validate one bulk-admit entry; returns (patient values, preferred ward types) or raises ValueError"""
+    if not isinstance(entry, dict):
+        raise ValueError('Entry must be an object')
+    name = (entry.get('name') or '').strip()
+    gender = (entry.get('gender') or '').strip()
+    if not name or entry.get('age') in (None, '') or not gender:
+        raise ValueError('Name, age and gender are required')
+    try:
+        age = int(entry['age'])
+    except (TypeError, ValueError):
+        raise ValueError('Age must be an integer')
+    if age < 0:
+        raise ValueError('Age must not be negative')
+    oxygen_required = entry.get('oxygen_required', defaults.get('oxygen_required', False))
+    if isinstance(oxygen_required, str):
+        oxygen_required = bool(parse_flag(oxygen_required))
+    oxygen_flow_rate = entry.get('oxygen_flow_rate')
+    if oxygen_flow_rate in (None, ''):
+        oxygen_flow_rate = None
+    else:
+        try:
+            oxygen_flow_rate = float(oxygen_flow_rate)
+        except (TypeError, ValueError):
+            raise ValueError('oxygen_flow_rate must be a number')
+    values = {
+        'name': name,
+        'age': age,
+        'gender': gender,
+        'oxygen_required': bool(oxygen_required),
+        'oxygen_flow_rate': oxygen_flow_rate,
+        **{field: entry.get(field) or None for field in BULK_ADMIT_OPTIONAL_FIELDS}
+    }
+    ward_type = (entry.get('ward_type') or defaults.get('ward_type') or '').strip().lower()
+    if ward_type:
+        preferred = (ward_type,)
+    elif values['oxygen_required']:
+        preferred = BULK_ADMIT_OXYGEN_WARD_TYPES
+    else:
+        preferred = ()
+    return values, preferred
+
+def allocate_beds(requests, free_beds):
+    """Assign free beds to requests in order: (index, values, preferred ward types).
+
+    Each request takes the first free bed in its preferred ward types, then
+    any free bed. Returns (placements, unplaced) where placements pairs each
+    request with its bed row.
+    """
+    by_type = defaultdict(deque)
+    for bed in free_beds:
+        by_type[bed.ward_type].append(bed)
+    taken = set()
+    
+    def take(queue):
+        while queue:
+            bed = queue.popleft()
+            if bed.id not in taken:
+                taken.add(bed.id)
+                return bed
+        return None
+    
+    everywhere = deque(free_beds)
+    placements, unplaced = [], []
+    for index, values, preferred in requests:
+        bed = None
+        for ward_type in preferred:
+            bed = take(by_type[ward_type])
+            if bed:
+                break
+        bed = bed or take(everywhere)
+        if bed is None:
+            unplaced.append({'index': index, 'name': values['name'], 'error': 'No free bed'})
+        else:
+            placements.append((index, values, preferred, bed))
+    return placements, unplaced
+
+def claim_beds(bed_ids, now):
+    """Occupy the given beds if they are still free; returns the ids this transaction claimed.
+
+    The conditional UPDATE row-locks only the chosen beds, so concurrent
+    admissions contend for the same bed rather than for every free one.
+    """
+    bed_table = Bed.__table__
+    return set(db.session.scalars(
+        update(bed_table)
+        .where(bed_table.c.id.in_(bed_ids), bed_table.c.status == 'empty', bed_table.c.patient_id.is_(None))
+        .values(status='occupied', updated_at=now)
+        .returning(bed_table.c.id)
+    ))
+
+def place_admissions(requests, now):
+    """Allocate and claim free beds for requests: (index, values, preferred ward types).
+
+    Free beds are read without locks and allocated in Python; the chosen beds
+    are then claimed with claim_beds. Requests whose bed was claimed first by
+    a concurrent request are reallocated among the beds not yet tried, for up
+    to BULK_ADMIT_CLAIM_ATTEMPTS rounds. Returns (placements, unplaced).
+    """
+    placements, unplaced = [], []
+    tried = set()
+    pending = requests
+    for _ in range(BULK_ADMIT_CLAIM_ATTEMPTS):
+        if not pending:
+            break
+        free_beds = db.session.execute(
+            select(Bed.id, Bed.ward_id, Bed.bed_number, Bed.status, Bed.patient_id,
+                   Ward.name.label('ward_name'), Ward.type.label('ward_type'))
+            .join(Ward, Bed.ward_id == Ward.id)
+            .where(Bed.status == 'empty', Bed.patient_id.is_(None), Bed.id.not_in(tried))
+            .order_by(Bed.ward_id, Bed.id)
+        ).all()
+        chosen, no_bed = allocate_beds(pending, free_beds)
+        unplaced += no_bed
+        if not chosen:
+            break
+        claimed = claim_beds([bed.id for _, _, _, bed in chosen], now)
+        tried.update(bed.id for _, _, _, bed in chosen)
+        placements += [placement for placement in chosen if placement[3].id in claimed]
+        pending = [(index, values, preferred) for index, values, preferred, bed in chosen if bed.id not in claimed]
+    else:
+        unplaced += [{'index': index, 'name': values['name'], 'error': 'No free bed'} for index, values, _ in pending]
+    return sorted(placements, key=lambda placement: placement[0]), unplaced
+
+def admit_patients(placements, user_id, now):
+    """Insert the placed patients, assign their claimed beds and write the audit rows, in bulk.
+
+    Patients go in with one multi-row INSERT ... RETURNING, the beds (already
+    claimed by place_admissions) get their patient with one executemany
+    UPDATE, and the audit rows go in with log_activities. The caller commits
+    or rolls back.
+    """
+    patient_ids = db.session.scalars(
+        insert(Patient.__table__).returning(Patient.__table__.c.id, sort_by_parameter_order=True),
+        [dict(values, admitted_on=now) for _, values, _, _ in placements]
+    ).all()
+    
+    bed_table = Bed.__table__
+    db.session.execute(
+        update(bed_table)
+        .where(bed_table.c.id == bindparam('bed_id'))
+        .values(patient_id=bindparam('new_patient_id')),
+        [{'bed_id': bed.id, 'new_patient_id': patient_id} for (_, _, _, bed), patient_id in zip(placements, patient_ids)]
+    )
+    
+    record_bulk_write(db.session, 'patient', patient_ids,
+                      scoped_names=[patient_version_key(patient_id) for patient_id in patient_ids])
+    # The bed rows were read before the claim, so they still carry status empty and no patient
+    record_bed_changes([(bed, 'occupied', patient_id) for (_, _, _, bed), patient_id in zip(placements, patient_ids)])
+    log_activities(user_id, 'admit_patient', [
+        f"patient {values['name']} to bed {bed.bed_number}" for _, values, _, bed in placements
+    ])
+    return patient_ids
+
+@app.route('/api/patients/bulk-admit', methods=['POST'])
+def bulk_admit_patients():
+    """Admit a batch of patients, allocating free beds server-side.
+
+    Body: {"patients": [{name, age, gender, oxygen_required, oxygen_flow_rate,
+    ward_type, ...}], "ward_type": default preferred ward type,
+    "oxygen_required": default}. Patients that cannot be placed are listed
+    in unplaced and are not created.
+    """
+    if 'user_id' not in session or session['user_role'] not in ['admin', 'staff']:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    data = request.get_json(silent=True) or {}
+    entries = data.get('patients')
+    if not isinstance(entries, list) or not entries:
+        return jsonify({'error': 'patients must be a non-empty list'}), 400
+    if len(entries) > BULK_ADMIT_LIMIT:
+        return jsonify({'error': f'At most {BULK_ADMIT_LIMIT} patients per request'}), 400
+    
+    requests_ok, unplaced = [], []
+    for index, entry in enumerate(entries):
+        try:
+            values, preferred = parse_admission(entry, data)
+            requests_ok.append((index, values, preferred))
+        except (TypeError, ValueError) as e:
+            name = entry.get('name') if isinstance(entry, dict) else None
+            unplaced.append({'index': index, 'name': name, 'error': str(e)})
+    
+    try:
+        now = datetime.now(timezone.utc)
+        placements, no_bed = place_admissions(requests_ok, now)
+        unplaced += no_bed
+        
+        patient_ids = admit_patients(placements, session['user_id'], now) if placements else []
+        db.session.commit()
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
+    
+    placed = [{
+        'index': index,
+        'patient_id': patient_id,
+        'name': values['name'],
+        'bed_id': bed.id,
+        'bed_number': bed.bed_number,
+        'ward_name': bed.ward_name,
+        'ward_type': bed.ward_type,
+        'preferred_ward': not preferred or bed.ward_type in preferred
+    } for (index, values, preferred, bed), patient_id in zip(placements, patient_ids)]
+    
+    return jsonify({
+        'success': True,
+        'message': f'Admitted {len(placed)} of {len(entries)} patient(s)',
+        'admitted_count': len(placed),
+        'placed': placed,
+        'unplaced': sorted(unplaced, key=lambda entry: entry['index']),
+        'stats': get_patient_stats(),
+        'bed_stats': get_bed_stats()
+    })
+
+def discharge_patients(patient_ids, user_id, action='discharge_patient', describe=lambda name: f'patient {name}',
+                       discharge_summary=None):
+    """Discharge the still-admitted patients among patient_ids with a fixed handful of set-based statements.
+
+    Stamps discharged_on, moves their occupied beds to cleaning, completes
+    their active medical records (adding discharge_summary when given) and
+    active medications, and writes one audit row per patient, however many
+    patients there are. Patients already discharged are skipped. Returns the
+    discharged patients' (id, name, discharged_on) rows; the caller commits.
+    """
+    if not patient_ids:
+        return []
+    now = datetime.now(timezone.utc)
+    discharged = db.session.execute(
+        update(Patient)
+        .where(Patient.id.in_(patient_ids), Patient.discharged_on.is_(None))
+        .values(discharged_on=now)
+        .returning(Patient.id, Patient.name, Patient.discharged_on)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not discharged:
+        return []
+    ids = [patient.id for patient in discharged]
+    record_bulk_write(db.session, 'patient', ids, scoped_names=[patient_version_key(patient_id) for patient_id in ids])
+    
+    # Free up their beds
+    update_beds([Bed.patient_id.in_(ids), Bed.status == 'occupied'], {'status': 'cleaning', 'patient_id': None})
+    
+    # Close out active treatment records
+    record_values = {'status': 'completed', 'discharge_date': now, 'updated_at': now}
+    if discharge_summary:
+        record_values['discharge_summary'] = discharge_summary
+    record_ids = db.session.scalars(
+        update(MedicalRecord)
+        .where(MedicalRecord.patient_id.in_(ids), MedicalRecord.status == 'active')
+        .values(record_values)
+        .returning(MedicalRecord.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    record_bulk_write(db.session, 'medical_record', record_ids)
+    
+    # Complete active medications
+    medication_ids = db.session.scalars(
+        update(Medication)
+        .where(Medication.patient_id.in_(ids), Medication.status == 'active')
+        .values(status='completed', end_date=now, updated_at=now)
+        .returning(Medication.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    record_bulk_write(db.session, 'medication', medication_ids)
+    
+    log_activities(user_id, action, [describe(patient.name) for patient in discharged])
+    return discharged
 
 @app.route('/api/patients/bulk-discharge', methods=['POST'])
 def bulk_discharge_patients():
@@ -1966,42 +3777,17 @@ def bulk_discharge_patients():
         if not patient_ids:
             return jsonify({'error': 'No patients selected'}), 400
         
-        # Get patients and their beds
-        patients = Patient.query.filter(
-            Patient.id.in_(patient_ids),
-            Patient.discharged_on.is_(None)
-        ).all()
-        
-        discharged_count = 0
-        
-        for patient in patients:
-            # Discharge patient
-            patient.discharged_on = datetime.now(timezone.utc)
-            
-            # Free up the bed
-            current_bed = Bed.query.filter_by(patient_id=patient.id, status='occupied').first()
-            if current_bed:
-                current_bed.status = 'cleaning'  # Set to cleaning after discharge
-                current_bed.patient_id = None
-                current_bed.last_updated = datetime.now(timezone.utc)
-            
-            # Log activity
-            log = ActivityLog(
-                user_id=session['user_id'],
-                action='discharge_patient',
-                target=f'patient {patient.name}',
-                timestamp=datetime.now(timezone.utc)
-            )
-            db.session.add(log)
-            discharged_count += 1
-        
+        discharged = discharge_patients(patient_ids, session['user_id'])
         db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'message': f'Successfully discharged {discharged_count} patient(s)',
-            'discharged_count': discharged_count
-        })
+        discharged_ids = [patient.id for patient in discharged]
+        return jsonify(row_delta(
+            removed=discharged_ids,
+            success=True,
+            message=f'Successfully discharged {len(discharged_ids)} patient(s)',
+            discharged_count=len(discharged_ids),
+            stats=get_patient_stats()
+        ))
     
     except Exception as e:
         db.session.rollback()
@@ -2018,87 +3804,68 @@ def discharge_single_patient(patient_id):
         if patient.discharged_on:
             return jsonify({'error': 'Patient already discharged'}), 400
         
-        # Discharge patient
-        patient.discharged_on = datetime.now(timezone.utc)
-        
-        # Free up the bed
-        current_bed = Bed.query.filter_by(patient_id=patient.id, status='occupied').first()
-        if current_bed:
-            current_bed.status = 'cleaning'
-            current_bed.patient_id = None
-            current_bed.last_updated = datetime.now(timezone.utc)
-        
-        # Log activity
-        log = ActivityLog(
-            user_id=session['user_id'],
-            action='discharge_patient',
-            target=f'patient {patient.name}',
-            timestamp=datetime.now(timezone.utc)
-        )
-        db.session.add(log)
-        
+        discharge_patients([patient.id], session['user_id'])
         db.session.commit()
         
-        return jsonify({'success': True, 'message': f'Patient {patient.name} discharged successfully'})
+        return jsonify(row_delta(
+            removed=[patient_id],
+            success=True,
+            message=f'Patient {patient.name} discharged successfully',
+            stats=get_patient_stats()
+        ))
     
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def patient_export(args):
+    """(header, query, to_row) of the patient export; takes the roster filters,
+    but covers discharged patients too unless discharged is given"""
+    now = utc_naive(datetime.now(timezone.utc))
+    
+    def to_row(patient):
+        length_of_stay = ''
+        status = 'Active'
+        if patient.discharged_on:
+            length_of_stay = (patient.discharged_on - patient.admitted_on).days
+            status = 'Discharged'
+        elif patient.admitted_on:
+            length_of_stay = (now - patient.admitted_on).days
+        return [
+            patient.id,
+            patient.name,
+            patient.age,
+            patient.gender,
+            patient.ward_name or '',
+            patient.bed_number or '',
+            'Yes' if patient.oxygen_required else 'No',
+            patient.oxygen_flow_rate or '',
+            format_timestamp(patient.admitted_on),
+            format_timestamp(patient.discharged_on),
+            length_of_stay,
+            status
+        ]
+    
+    # Patients with bed and ward info, read as plain column tuples
+    query = filter_patients(db.session.query(
+        Patient.id, Patient.name, Patient.age, Patient.gender,
+        Patient.oxygen_required, Patient.oxygen_flow_rate,
+        Patient.admitted_on, Patient.discharged_on,
+        Ward.name.label('ward_name'), Bed.bed_number
+    ).outerjoin(Bed, Bed.patient_id == Patient.id).outerjoin(Ward, Bed.ward_id == Ward.id),
+        {'discharged': 'all', **args}).order_by(Patient.id)
+    header = ['Patient ID', 'Name', 'Age', 'Gender', 'Ward', 'Bed Number', 
+              'Oxygen Required', 'Oxygen Flow Rate', 'Admitted Date', 
+              'Discharged Date', 'Length of Stay (Days)', 'Status']
+    return header, query, to_row
+
 @app.route('/api/patients/export')
 def export_patients():
     if 'user_id' not in session or session['user_role'] != 'admin':
         return jsonify({'error': 'Unauthorized'}), 401
     
     try:
-        import csv
-        import io
-        from flask import make_response
-        
-        # Get all patients with bed and ward info
-        patients_data = db.session.query(Patient, Bed, Ward).outerjoin(Bed).outerjoin(Ward).all()
-        
-        # Create CSV content
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write headers
-        writer.writerow([
-            'Patient ID', 'Name', 'Age', 'Gender', 'Ward', 'Bed Number', 
-            'Oxygen Required', 'Oxygen Flow Rate', 'Admitted Date', 
-            'Discharged Date', 'Length of Stay (Days)', 'Status'
-        ])
-        
-        # Write data
-        for patient, bed, ward in patients_data:
-            length_of_stay = ''
-            status = 'Active'
-            
-            if patient.discharged_on:
-                length_of_stay = (patient.discharged_on - patient.admitted_on).days
-                status = 'Discharged'
-            elif patient.admitted_on:
-                length_of_stay = (datetime.now(timezone.utc) - patient.admitted_on).days
-            
-            writer.writerow([
-                patient.id,
-                patient.name,
-                patient.age,
-                patient.gender,
-                ward.name if ward else '',
-                bed.bed_number if bed else '',
-                'Yes' if patient.oxygen_required else 'No',
-                patient.oxygen_flow_rate or '',
-                patient.admitted_on.strftime('%Y-%m-%d %H:%M:%S') if patient.admitted_on else '',
-                patient.discharged_on.strftime('%Y-%m-%d %H:%M:%S') if patient.discharged_on else '',
-                length_of_stay,
-                status
-            ])
-        
-        # Create response
-        response = make_response(output.getvalue())
-        response.headers['Content-Type'] = 'text/csv'
-        response.headers['Content-Disposition'] = f'attachment; filename=patients_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        header, query, to_row = patient_export(request.args)
         
         # Log activity
         log = ActivityLog(
@@ -2110,9 +3877,12 @@ def export_patients():
         db.session.add(log)
         db.session.commit()
         
-        return response
+        return csv_export_response(export_filename('patients'), header, export_rows(query, to_row))
     
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/patients/report')
@@ -2149,13 +3919,11 @@ def generate_patient_report():
         
         # Ward distribution
         ward_distribution = {}
-        for patient in active_patients:
-            bed = Bed.query.filter_by(patient_id=patient.id, status='occupied').first()
-            if bed and bed.ward:
-                ward_name = bed.ward.name
-                if ward_name not in ward_distribution:
-                    ward_distribution[ward_name] = 0
-                ward_distribution[ward_name] += 1
+        placements = load_patient_placements([patient.id for patient in active_patients])
+        for ward_name, bed_number in placements.values():
+            if ward_name not in ward_distribution:
+                ward_distribution[ward_name] = 0
+            ward_distribution[ward_name] += 1
         
         # Recent admissions (last 7 days)
         week_ago = datetime.now(timezone.utc) - timedelta(days=7)
@@ -2317,18 +4085,20 @@ def edit_patient(patient_id):
         db.session.add(log)
         db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'message': 'Patient information updated successfully',
-            'patient': {
+        return jsonify(row_delta(
+            patient_rows('admin/_patient_row.html', [patient.id]),
+            success=True,
+            message='Patient information updated successfully',
+            patient={
                 'id': patient.id,
                 'name': patient.name,
                 'age': patient.age,
                 'gender': patient.gender,
                 'oxygen_required': patient.oxygen_required,
                 'oxygen_flow_rate': patient.oxygen_flow_rate
-            }
-        })
+            },
+            stats=get_patient_stats()
+        ))
     
     except Exception as e:
         db.session.rollback()
@@ -2410,70 +4180,28 @@ def staff_discharge_patient(patient_id):
         if patient.discharged_on:
             return jsonify({'error': 'Patient is already discharged'}), 400
         
-        # Get the current bed assignment
-        current_bed = Bed.query.filter_by(patient_id=patient_id, status='occupied').first()
-        
-        # Discharge the patient
-        patient.discharged_on = datetime.now(timezone.utc)
-        
-        # Update bed status if patient has a bed
-        if current_bed:
-            current_bed.status = 'cleaning'
-            current_bed.patient_id = None
-            current_bed.last_updated = datetime.now(timezone.utc)
-        
-        # Update any active treatment records (if status field exists)
-        try:
-            active_records = MedicalRecord.query.filter_by(
-                patient_id=patient_id
-            ).all()
-            
-            for record in active_records:
-                # Only update status if the field exists
-                if hasattr(record, 'status'):
-                    record.status = 'completed'
-                if hasattr(record, 'discharge_date'):
-                    record.discharge_date = datetime.now(timezone.utc)
-                if hasattr(record, 'discharge_summary') and data.get('discharge_summary'):
-                    record.discharge_summary = data['discharge_summary']
-        except Exception as e:
-            print(f"Warning: Could not update medical records: {e}")
-        
-        # Update active medications to completed
-        try:
-            active_medications = Medication.query.filter_by(
-                patient_id=patient_id,
-                status='active'
-            ).all()
-            
-            for medication in active_medications:
-                medication.status = 'completed'
-                medication.end_date = datetime.now(timezone.utc)
-        except Exception as e:
-            print(f"Warning: Could not update medications: {e}")
-        
-        # Commit all changes
-        db.session.commit()
-        
-        # Log the discharge activity
-        log = ActivityLog(
-            user_id=session['user_id'],
+        # Discharge the patient, free the bed and close out records and medications
+        discharged = discharge_patients(
+            [patient.id], session['user_id'],
             action='discharge',
-            target=f"Patient {patient.name} discharged by staff",
-            timestamp=datetime.now(timezone.utc)
+            describe=lambda name: f"Patient {name} discharged by staff",
+            discharge_summary=data.get('discharge_summary')
         )
-        db.session.add(log)
+        if not discharged:
+            db.session.rollback()
+            return jsonify({'error': 'Patient is already discharged'}), 400
         db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'message': f'Patient {patient.name} has been successfully discharged',
-            'patient': {
+        return jsonify(row_delta(
+            removed=[patient.id],
+            success=True,
+            message=f'Patient {patient.name} has been successfully discharged',
+            patient={
                 'id': patient.id,
                 'name': patient.name,
-                'discharged_on': patient.discharged_on.strftime('%Y-%m-%d %H:%M:%S')
+                'discharged_on': discharged[0].discharged_on.strftime('%Y-%m-%d %H:%M:%S')
             }
-        })
+        ))
     
     except Exception as e:
         db.session.rollback()
@@ -2547,22 +4275,116 @@ def add_prescription():
         
         db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'message': f'Successfully prescribed {medication_name} to {patient.name}',
-            'medication': {
+        return jsonify(row_delta(
+            prescription_rows([new_medication.id]),
+            success=True,
+            message=f'Successfully prescribed {medication_name} to {patient.name}',
+            medication={
                 'id': new_medication.id,
                 'medication_name': new_medication.medication_name,
                 'dosage': new_medication.dosage,
                 'frequency': new_medication.frequency,
                 'route': new_medication.route,
                 'prescribed_by': new_medication.prescribed_by
-            }
-        })
+            },
+            stats=get_prescription_stats()
+        ))
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+BULK_PRESCRIBE_LIMIT = 1000  # medication rows per request
+
+def parse_order_set(drugs):
+    """Validate an order set's drugs; returns Medication column values per drug or raises ValueError"""
+    if not isinstance(drugs, list) or not drugs:
+        raise ValueError('medications must be a non-empty list')
+    parsed = []
+    for position, drug in enumerate(drugs, start=1):
+        if not isinstance(drug, dict):
+            raise ValueError(f'Medication {position} must be an object')
+        fields = {field: (str(drug.get(field) or '')).strip() for field in ('medication_name', 'dosage', 'frequency', 'route')}
+        if not all(fields.values()):
+            raise ValueError(f'Medication {position}: all medication fields are required')
+        duration_days = drug.get('duration_days')
+        try:
+            duration = timedelta(days=int(duration_days)) if duration_days not in (None, '') else None
+        except (TypeError, ValueError):
+            raise ValueError(f'Medication {position}: invalid duration format')
+        parsed.append((fields, duration, drug.get('notes') or ''))
+    return parsed
+
+@app.route('/api/prescriptions/bulk', methods=['POST'])
+def bulk_prescribe():
+    """Prescribe an order set (a list of drugs) to one or many patients in one batch.
+
+    Body: {"patient_ids": [...], "medications": [{medication_name, dosage,
+    frequency, route, duration_days, notes}], "order_set": optional name for
+    the audit log}. The batch is all-or-nothing: an unknown or discharged
+    patient rejects it.
+    """
+    if 'user_id' not in session or session['user_role'] != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
     
+    data = request.get_json(silent=True) or {}
+    raw_ids = data.get('patient_ids')
+    patient_ids = list(dict.fromkeys(raw_ids)) if is_id_list(raw_ids) else None
+    if not patient_ids:
+        return jsonify({'error': 'patient_ids must be a non-empty list of integer ids'}), 400
+    try:
+        drugs = parse_order_set(data.get('medications'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if len(patient_ids) * len(drugs) > BULK_PRESCRIBE_LIMIT:
+        return jsonify({'error': f'At most {BULK_PRESCRIBE_LIMIT} prescriptions per request'}), 400
+    order_set = (data.get('order_set') or '').strip()
+    
+    try:
+        patients = {
+            patient.id: patient for patient in db.session.execute(
+                select(Patient.id, Patient.name, Patient.discharged_on).where(Patient.id.in_(patient_ids))
+            )
+        }
+        missing = [patient_id for patient_id in patient_ids if patient_id not in patients]
+        if missing:
+            return jsonify({'error': 'Patient not found', 'patient_ids': missing}), 404
+        discharged = [patient_id for patient_id in patient_ids if patients[patient_id].discharged_on]
+        if discharged:
+            return jsonify({'error': 'Cannot prescribe medication to discharged patient', 'patient_ids': discharged}), 400
+        
+        prescribed_by = db.session.scalar(select(User.name).where(User.id == session['user_id']))
+        now = datetime.now(timezone.utc)
+        rows = [
+            dict(fields, patient_id=patient_id, end_date=now + duration if duration else None, status='active',
+                 prescribed_by=prescribed_by, notes=notes, start_date=now, created_at=now, updated_at=now)
+            for patient_id in patient_ids for fields, duration, notes in drugs
+        ]
+        medication_ids = db.session.scalars(
+            insert(Medication.__table__).returning(Medication.__table__.c.id, sort_by_parameter_order=True), rows
+        ).all()
+        record_bulk_write(db.session, 'medication', medication_ids,
+                          scoped_names=[patient_version_key(patient_id) for patient_id in patient_ids])
+        suffix = f' ({order_set})' if order_set else ''
+        log_activities(session['user_id'], 'prescribe', [
+            f"{row['medication_name']} to patient {patients[row['patient_id']].name}{suffix}" for row in rows
+        ])
+        db.session.commit()
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
+    
+    created = defaultdict(list)
+    for row, medication_id in zip(rows, medication_ids):
+        created[row['patient_id']].append(medication_id)
+    return jsonify(row_delta(
+        prescription_rows(medication_ids),
+        success=True,
+        message=f'Prescribed {len(medication_ids)} medication(s) to {len(patient_ids)} patient(s)',
+        medication_ids=medication_ids,
+        prescriptions=[{'patient_id': patient_id, 'medication_ids': created[patient_id]} for patient_id in patient_ids],
+        stats=get_prescription_stats()
+    ))
 
 @app.route('/api/prescriptions/patient/<int:patient_id>')
 def get_patient_prescriptions(patient_id):
@@ -2647,10 +4469,12 @@ def update_prescription(medication_id):
         
         db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'message': 'Prescription updated successfully'
-        })
+        return jsonify(row_delta(
+            prescription_rows([medication.id]),
+            success=True,
+            message='Prescription updated successfully',
+            stats=get_prescription_stats()
+        ))
     
     except Exception as e:
         db.session.rollback()
@@ -2668,12 +4492,7 @@ def admin_prescriptions():
     recent_prescriptions = db.session.query(Medication, Patient).join(Patient).order_by(Medication.created_at.desc()).limit(20).all()
     
     # Get prescription statistics
-    prescription_stats = {
-        'total_prescriptions': Medication.query.count(),
-        'active_prescriptions': Medication.query.filter_by(status='active').count(),
-        'completed_prescriptions': Medication.query.filter_by(status='completed').count(),
-        'discontinued_prescriptions': Medication.query.filter_by(status='discontinued').count()
-    }
+    prescription_stats = get_prescription_stats()
     
     return render_template('admin/prescriptions.html',
                          active_patients=active_patients,
@@ -2686,12 +4505,7 @@ def admin_shift_management():
         return redirect(url_for('login'))
     
     # Get shift statistics
-    shift_stats = {
-        'total_shifts': Shift.query.count(),
-        'active_shifts': Shift.query.filter_by(status='active').count(),
-        'scheduled_shifts': Shift.query.filter_by(status='scheduled').count(),
-        'completed_shifts': Shift.query.filter_by(status='completed').count()
-    }
+    shift_stats = get_shift_stats()
     
     # Get all staff members for shift assignment
     staff_members = User.query.filter_by(role='staff').all()
@@ -2719,6 +4533,10 @@ def get_available_beds():
         return jsonify({'error': 'Unauthorized'}), 401
     
     try:
+        etag, _ = get_validator('beds_available', ['bed', 'ward'])
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+        
         # Get available beds with ward information
         available_beds = db.session.query(Bed, Ward).join(Ward).filter(
             Bed.status == 'empty'
@@ -2733,7 +4551,7 @@ def get_available_beds():
                 'ward_type': ward.type
             })
         
-        return jsonify({'beds': beds_list})
+        return with_etag(jsonify({'beds': beds_list}), etag)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -2801,7 +4619,12 @@ def add_shift():
         
         db.session.commit()
         
-        return jsonify({'success': True, 'message': f'Shift created for {staff_member.name}'})
+        return jsonify(row_delta(
+            shift_rows([new_shift.id]),
+            success=True,
+            message=f'Shift created for {staff_member.name}',
+            stats=get_shift_stats()
+        ))
     
     except Exception as e:
         db.session.rollback()
@@ -2835,49 +4658,45 @@ def delete_shift(shift_id):
         
         db.session.commit()
         
-        return jsonify({'success': True, 'message': f'Shift deleted for {staff_member.name}'})
+        return jsonify(row_delta(
+            removed=[shift_id],
+            success=True,
+            message=f'Shift deleted for {staff_member.name}',
+            stats=get_shift_stats()
+        ))
     
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def shift_export(args):
+    """(header, query, to_row) of the shift export; takes optional status and user_id filters"""
+    # Shifts with staff names, newest first
+    query = db.session.query(
+        User.name, Shift.shift_type, Shift.start_time, Shift.end_time, Shift.status, Shift.created_at
+    ).join(User, Shift.user_id == User.id)
+    if args.get('status'):
+        query = query.filter(Shift.status == args['status'])
+    if args.get('user_id'):
+        query = query.filter(Shift.user_id == int(args['user_id']))
+    header = ['Staff Name', 'Shift Type', 'Start Time', 'End Time', 'Status', 'Duration (Hours)', 'Created Date']
+    return header, query.order_by(Shift.start_time.desc()), lambda shift: [
+        shift.name,
+        shift.shift_type,
+        format_timestamp(shift.start_time),
+        format_timestamp(shift.end_time),
+        shift.status,
+        round((shift.end_time - shift.start_time).total_seconds() / 3600, 2),
+        format_timestamp(shift.created_at)
+    ]
+
 @app.route('/api/shifts/export')
 def export_shifts():
     if 'user_id' not in session or session['user_role'] != 'admin':
         return jsonify({'error': 'Unauthorized'}), 401
     
     try:
-        import csv
-        import io
-        from flask import make_response
-        
-        # Get all shifts with staff info
-        shifts_data = db.session.query(Shift, User).join(User).order_by(Shift.start_time.desc()).all()
-        
-        # Create CSV content
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write headers
-        writer.writerow(['Staff Name', 'Shift Type', 'Start Time', 'End Time', 'Status', 'Duration (Hours)', 'Created Date'])
-        
-        # Write data
-        for shift, staff in shifts_data:
-            duration = (shift.end_time - shift.start_time).total_seconds() / 3600
-            writer.writerow([
-                staff.name,
-                shift.shift_type,
-                shift.start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                shift.end_time.strftime('%Y-%m-%d %H:%M:%S'),
-                shift.status,
-                round(duration, 2),
-                shift.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            ])
-        
-        # Create response
-        response = make_response(output.getvalue())
-        response.headers['Content-Type'] = 'text/csv'
-        response.headers['Content-Disposition'] = f'attachment; filename=shifts_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        header, query, to_row = shift_export(request.args)
         
         # Log activity
         log = ActivityLog(
@@ -2889,32 +4708,367 @@ def export_shifts():
         db.session.add(log)
         db.session.commit()
         
-        return response
+        return csv_export_response(export_filename('shifts'), header, export_rows(query, to_row))
     
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+EXPORT_SPECS = {
+    'inventory': inventory_export,
+    'beds': bed_export,
+    'staff': staff_export,
+    'patients': patient_export,
+    'shifts': shift_export
+}
+
+# The streaming export route of each entity
+EXPORT_ENDPOINTS = {
+    'inventory': 'export_inventory',
+    'beds': 'export_beds',
+    'staff': 'export_staff',
+    'patients': 'export_patients',
+    'shifts': 'export_shifts'
+}
+
+# Export jobs run on background threads and keep their records and files in the
+# instance folder. Neither holds on Vercel: a function instance is frozen once
+# its response is sent, so a queued job stops running, and every instance has
+# its own /tmp, so a status poll or download can reach one that never saw the
+# job. There the job API answers 501 and points at the streaming export routes.
+if os.environ.get('VERCEL'):
+    export_jobs = None
+else:
+    export_jobs = ExportJobManager(
+        os.path.join(app.instance_path, 'exports'),
+        EXPORT_SPECS,
+        max_workers=int(os.environ.get('EXPORT_WORKERS', 2)),
+        user_limit=int(os.environ.get('EXPORT_USER_LIMIT', 2)),
+        active_limit=int(os.environ.get('EXPORT_ACTIVE_LIMIT', 8)),
+        ttl_seconds=int(os.environ.get('EXPORT_ARTIFACT_TTL_HOURS', 24)) * 3600
+    )
+
+def export_jobs_unavailable(export_url=None):
+    """501 from the job API where background exports cannot run"""
+    payload = {'error': 'Background exports are not available on this deployment; use the streaming export'}
+    if export_url:
+        payload['export_url'] = export_url
+    return jsonify(payload), 501
+
+def export_timestamp(value):
+    return datetime.fromtimestamp(value, timezone.utc).isoformat() if value else None
+
+def export_job_json(job):
+    progress = None
+    if job['status'] == 'done':
+        progress = 100
+    elif job['total_rows']:
+        progress = min(99, int(job['rows_written'] * 100 / job['total_rows']))
+    return {
+        'id': job['id'],
+        'entity': job['entity'],
+        'format': job['format'],
+        'filters': json.loads(job['filters']),
+        'status': job['status'],
+        'rows_written': job['rows_written'],
+        'total_rows': job['total_rows'],
+        'progress': progress,
+        'size': job['size'],
+        'error': job['error'],
+        'created_at': export_timestamp(job['created_at']),
+        'started_at': export_timestamp(job['started_at']),
+        'finished_at': export_timestamp(job['finished_at']),
+        'expires_at': export_timestamp(job['expires_at']),
+        'status_url': url_for('export_job_status', job_id=job['id']),
+        'download_url': url_for('download_export_job', job_id=job['id']) if job['status'] == 'done' else None
+    }
+
+def owned_export_job(job_id):
+    job = export_jobs.store.get(job_id)
+    if job is None or job['user_id'] != session['user_id']:
+        return None
+    return job
+
+@app.route('/api/exports', methods=['POST'])
+def create_export_job():
+    if 'user_id' not in session or session['user_role'] != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    data = request.get_json(silent=True) or {}
+    entity = data.get('entity')
+    fmt = data.get('format', 'csv')
+    filters = data.get('filters') or {}
+    if entity not in EXPORT_SPECS:
+        return jsonify({'error': f"entity must be one of: {', '.join(EXPORT_SPECS)}"}), 400
+    if fmt not in ExportJobManager.FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(ExportJobManager.FORMATS)}"}), 400
+    if not isinstance(filters, dict):
+        return jsonify({'error': 'filters must be an object'}), 400
+    filters = {key: str(value) for key, value in filters.items() if value not in (None, '')}
+    if export_jobs is None:
+        return export_jobs_unavailable(url_for(EXPORT_ENDPOINTS[entity], **filters))
+    
+    try:
+        # Building the query checks the filters now rather than in the worker
+        EXPORT_SPECS[entity](filters)
+        job_id = export_jobs.submit(session['user_id'], entity, fmt, filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except ExportLimitError as e:
+        return jsonify({'error': str(e)}), 429
+    
+    try:
+        # Log activity
+        log = ActivityLog(
+            user_id=session['user_id'],
+            action='export',
+            target=f'{entity} data (background export)',
+            timestamp=datetime.now(timezone.utc)
+        )
+        db.session.add(log)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+    
+    job = export_job_json(export_jobs.store.get(job_id))
+    response = jsonify({'success': True, 'job': job})
+    response.status_code = 202
+    response.headers['Location'] = job['status_url']
+    return response
+
+@app.route('/api/exports')
+def list_export_jobs():
+    if 'user_id' not in session or session['user_role'] != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    if export_jobs is None:
+        return export_jobs_unavailable()
+    export_jobs.sweep()
+    return jsonify({'jobs': [export_job_json(job) for job in export_jobs.store.for_user(session['user_id'])]})
+
+@app.route('/api/exports/<job_id>')
+def export_job_status(job_id):
+    if 'user_id' not in session or session['user_role'] != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    if export_jobs is None:
+        return export_jobs_unavailable()
+    job = owned_export_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Export not found'}), 404
+    return jsonify({'job': export_job_json(job)})
+
+@app.route('/api/exports/<job_id>/download')
+def download_export_job(job_id):
+    if 'user_id' not in session or session['user_role'] != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    if export_jobs is None:
+        return export_jobs_unavailable()
+    export_jobs.sweep()
+    job = owned_export_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Export not found'}), 404
+    if job['status'] == 'expired':
+        return jsonify({'error': 'Export has expired'}), 410
+    if job['status'] != 'done':
+        return jsonify({'error': f"Export is {job['status']}"}), 409
+    
+    extension, mimetype = ExportJobManager.FORMATS[job['format']]
+    created = datetime.fromtimestamp(job['created_at'], timezone.utc)
+    # conditional=True answers Range requests with 206, so a broken download can resume.
+    # Gzipped artifacts are served as .csv.gz files rather than with Content-Encoding,
+    # so byte ranges refer to the stored file.
+    return send_file(
+        export_jobs.artifact_path(job['id'], job['format']),
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=f"{job['entity']}_export_{created.strftime('%Y%m%d_%H%M%S')}.{extension}",
+        conditional=True,
+        max_age=0
+    )
+
+CHANGE_FEED_PAGE_SIZE = 500
+CHANGE_FEED_PAGE_LIMIT = 5000
+
+# Entities served by the incremental export, and columns never sent downstream
+CHANGE_FEEDS = {
+    'beds': Bed,
+    'patients': Patient,
+    'medications': Medication,
+    'medical_records': MedicalRecord,
+    'shifts': Shift,
+    'inventory': Inventory,
+    'staff': User
+}
+CHANGE_FEED_EXCLUDED_COLUMNS = {'password_hash'}
+
+def change_row(obj):
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in row_values(obj).items()
+        if key not in CHANGE_FEED_EXCLUDED_COLUMNS
+    }
+
+def snapshot_changes(model, cursor=None, limit=CHANGE_FEED_PAGE_SIZE):
+    """Every row of the table by id, as upserts. The watermark is the table's
+    version when the snapshot started; anything written while it is paged
+    through comes round again in the next incremental pull."""
+    if cursor:
+        upper, after_id = decode_cursor(cursor)
+    else:
+        upper, after_id = get_data_versions(db.session, [model.__table__.name])[0], 0
+    rows = model.query.filter(model.id > int(after_id)).order_by(model.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(upper, rows[-1].id)
+    changes = [{'op': 'upsert', 'id': row.id, 'row': change_row(row)} for row in rows]
+    return changes, next_cursor, upper
+
+def incremental_changes(model, since, cursor=None, limit=CHANGE_FEED_PAGE_SIZE):
+    """The latest change of every row written after version since, oldest first.
+
+    The window's upper bound is the table's version on the first page and is
+    carried in the cursor, so paging never chases new writes. Raises LookupError
+    when entries after since have already been pruned.
+    """
+    table_name = model.__table__.name
+    if cursor:
+        upper, after_version, after_row_id = decode_cursor(cursor)
+    else:
+        upper = get_data_versions(db.session, [table_name])[0]
+        after_version, after_row_id = since, 0
+        floor = db.session.query(db.func.min(ChangeLog.version)).filter(ChangeLog.table_name == table_name).scalar()
+        if since < (floor if floor is not None else upper + 1) - 1 or since > upper:
+            raise LookupError('Watermark is no longer covered by the change log; resync from a snapshot')
+    latest = db.session.query(
+        ChangeLog.row_id, db.func.max(ChangeLog.id).label('id')
+    ).filter(
+        ChangeLog.table_name == table_name,
+        ChangeLog.version > since,
+        ChangeLog.version <= upper
+    ).group_by(ChangeLog.row_id).subquery()
+    entries = db.session.query(ChangeLog.row_id, ChangeLog.version, ChangeLog.op).join(
+        latest, ChangeLog.id == latest.c.id
+    ).filter(db.or_(
+        ChangeLog.version > after_version,
+        db.and_(ChangeLog.version == after_version, ChangeLog.row_id > after_row_id)
+    )).order_by(ChangeLog.version, ChangeLog.row_id).limit(limit + 1).all()
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        next_cursor = encode_cursor(upper, entries[-1].version, entries[-1].row_id)
+    
+    upsert_ids = [entry.row_id for entry in entries if entry.op == 'upsert']
+    rows = {row.id: row for row in model.query.filter(model.id.in_(upsert_ids))} if upsert_ids else {}
+    changes = []
+    for entry in entries:
+        row = rows.get(entry.row_id)
+        if entry.op == 'upsert' and row is not None:
+            changes.append({'op': 'upsert', 'id': entry.row_id, 'version': entry.version, 'row': change_row(row)})
+        else:
+            # Deleted, or gone by a path the change log did not see: either way a tombstone
+            changes.append({'op': 'delete', 'id': entry.row_id, 'version': entry.version})
+    return changes, next_cursor, upper
+
+@app.route('/api/changes/<entity>')
+def export_changes(entity):
+    """Incremental export for warehouse syncs.
+
+    Without since, pages through a full snapshot. With since (the watermark
+    returned by the previous sync), returns only rows upserted or deleted
+    since then. Follow next_cursor until it is null, then store watermark.
+    """
+    if 'user_id' not in session or session['user_role'] != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    model = CHANGE_FEEDS.get(entity)
+    if model is None:
+        return jsonify({'error': f"entity must be one of: {', '.join(CHANGE_FEEDS)}"}), 400
+    
+    try:
+        limit = max(1, min(int(request.args.get('limit', CHANGE_FEED_PAGE_SIZE)), CHANGE_FEED_PAGE_LIMIT))
+        cursor = request.args.get('cursor')
+        since = request.args.get('since')
+        if since in (None, ''):
+            changes, next_cursor, watermark = snapshot_changes(model, cursor, limit)
+        else:
+            changes, next_cursor, watermark = incremental_changes(model, int(since), cursor, limit)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid since, cursor or limit'}), 400
+    except LookupError as e:
+        return jsonify({'error': str(e), 'resync': True}), 410
+    
+    return jsonify({
+        'entity': entity,
+        'mode': 'incremental' if since else 'snapshot',
+        'changes': changes,
+        'next_cursor': next_cursor,
+        'watermark': watermark,
+        'complete': next_cursor is None
+    })
+
 @app.route('/api/recent_activities')
 def recent_activities():
     if 'user_id' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    # Get recent activities with user information
-    activities = db.session.query(ActivityLog, User).join(User).order_by(ActivityLog.timestamp.desc()).limit(20).all()
-    
-    activity_list = []
-    for activity, user in activities:
-        activity_list.append({
-            'id': activity.id,
-            'user_name': user.name,
-            'user_role': user.role,
-            'action': activity.action,
-            'target': activity.target,
-            'timestamp': activity.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            'time_ago': get_time_ago(activity.timestamp)
+    # Delta polls: only rows newer than the client's cursor
+    after_id = request.args.get('after_id', type=int)
+    since = request.args.get('since')
+    if after_id is not None:
+        # Oldest first, so a client that is behind catches up page by page without gaps
+        entries, has_more = activity_feed.after(after_id, 20)
+        return jsonify({
+            'activities': [feed_entry_json(entry) for entry in entries],
+            'last_id': entries[-1].id if entries else after_id,
+            'has_more': has_more
+        })
+    if since:
+        try:
+            since_dt = datetime.fromisoformat(since.replace('Z', '+00:00'))
+        except ValueError:
+            return jsonify({'error': 'Invalid since timestamp'}), 400
+        since_dt = utc_naive(since_dt)
+        
+        # Served from the activity_log timestamp index
+        rows = db.session.query(ActivityLog, User.name, User.role).join(User).filter(
+            ActivityLog.timestamp > since_dt
+        ).order_by(ActivityLog.timestamp.desc()).limit(20).all()
+        entries = [
+            FeedEntry(activity.id, activity.user_id, name, role, activity.action, activity.target, activity.timestamp)
+            for activity, name, role in rows
+        ]
+        return jsonify({
+            'activities': [feed_entry_json(entry) for entry in entries],
+            'last_id': max([entry.id for entry in entries], default=0)
         })
     
-    return jsonify({'activities': activity_list})
+    # time_ago has minute resolution, so the validator also rolls over every minute
+    etag, _ = get_validator('recent_activities', ['activity_log', 'user'], int(datetime.now(timezone.utc).timestamp() // 60))
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+    
+    entries = activity_feed.latest(20)
+    
+    return with_etag(jsonify({
+        'activities': [feed_entry_json(entry) for entry in entries],
+        'last_id': max([entry.id for entry in entries], default=0)
+    }), etag)
+
+def feed_entry_json(entry):
+    return {
+        'id': entry.id,
+        'user_name': entry.user_name,
+        'user_role': entry.user_role,
+        'action': entry.action,
+        'target': entry.target,
+        'timestamp': entry.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+        'time_ago': get_time_ago(entry.timestamp)
+    }
 
 def get_time_ago(timestamp):
     """Calculate time ago string"""
@@ -2934,83 +5088,89 @@ def get_time_ago(timestamp):
         return "Just now"
 
 # Ward Details API
+def build_ward_snapshot(ward_id):
+    """Ward, beds, patients and status counts for the ward details modal, from one outer join"""
+    rows = db.session.query(Ward, Bed, Patient).select_from(Ward).outerjoin(
+        Bed, Bed.ward_id == Ward.id
+    ).outerjoin(
+        Patient, Patient.id == Bed.patient_id
+    ).filter(Ward.id == ward_id).order_by(Bed.id).all()
+    if not rows:
+        return None
+    
+    ward = rows[0][0]
+    status_counts = dict.fromkeys(BED_STATUSES, 0)
+    bed_details = []
+    patients = []
+    for _, bed, patient in rows:
+        if bed is None:
+            continue
+        status_counts[bed.status] = status_counts.get(bed.status, 0) + 1
+        bed_info = {
+            'id': bed.id,
+            'bed_number': bed.bed_number,
+            'status': bed.status,
+            'patient_name': None,
+            'oxygen_required': False,
+            'oxygen_flow_rate': None,
+            'updated_at': bed.updated_at.strftime('%Y-%m-%d %H:%M')
+        }
+        
+        # Add patient info if bed is occupied
+        if bed.status == 'occupied' and patient is not None:
+            bed_info['patient_name'] = patient.name
+            bed_info['oxygen_required'] = patient.oxygen_required
+            bed_info['oxygen_flow_rate'] = patient.oxygen_flow_rate
+            patients.append({
+                'name': patient.name,
+                'age': patient.age,
+                'gender': patient.gender,
+                'bed_number': bed.bed_number,
+                'oxygen_required': patient.oxygen_required,
+                'oxygen_flow_rate': patient.oxygen_flow_rate,
+                'admission_date': patient.admitted_on.strftime('%Y-%m-%d') if patient.admitted_on else None
+            })
+        
+        bed_details.append(bed_info)
+    
+    total_beds = len(bed_details)
+    occupied_beds = status_counts['occupied']
+    return {
+        'ward': {
+            'id': ward.id,
+            'name': ward.name,
+            'type': ward.type
+        },
+        'statistics': {
+            'total_beds': total_beds,
+            'occupied_beds': occupied_beds,
+            'available_beds': status_counts['empty'],
+            'cleaning_beds': status_counts['cleaning'],
+            'maintenance_beds': status_counts['maintenance'],
+            'reserved_beds': status_counts['reserved'],
+            'occupancy_rate': (occupied_beds / total_beds * 100) if total_beds > 0 else 0
+        },
+        'beds': bed_details,
+        'patients': patients
+    }
+
 @app.route('/api/ward-details/<int:ward_id>')
 def get_ward_details(ward_id):
     if 'user_id' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
     try:
-        ward = Ward.query.get(ward_id)
-        if not ward:
+        # Versioned per ward, so writes to other wards leave this snapshot cached
+        cache_key = f'ward_details:{ward_id}'
+        etag, versions = get_validator(cache_key, [ward_version_key(ward_id)])
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+        
+        snapshot = response_cache.get_or_build(cache_key, versions, lambda: build_ward_snapshot(ward_id))
+        if snapshot is None:
             return jsonify({'error': 'Ward not found'}), 404
-            
-        beds = Bed.query.filter_by(ward_id=ward_id).all()
-        
-        # Get bed statistics
-        total_beds = len(beds)
-        occupied_beds = len([b for b in beds if b.status == 'occupied'])
-        available_beds = len([b for b in beds if b.status == 'empty'])
-        cleaning_beds = len([b for b in beds if b.status == 'cleaning'])
-        maintenance_beds = len([b for b in beds if b.status == 'maintenance'])
-        reserved_beds = len([b for b in beds if b.status == 'reserved'])
-        
-        # Get patients in this ward
-        patients_in_ward = db.session.query(Patient, Bed).join(
-            Bed, Patient.id == Bed.patient_id
-        ).filter(Bed.ward_id == ward_id, Bed.status == 'occupied').all()
-        
-        # Format bed details
-        bed_details = []
-        for bed in beds:
-            bed_info = {
-                'id': bed.id,
-                'bed_number': bed.bed_number,
-                'status': bed.status,
-                'patient_name': None,
-                'oxygen_required': False,
-                'oxygen_flow_rate': None,
-                'updated_at': bed.updated_at.strftime('%Y-%m-%d %H:%M')
-            }
-            
-            # Add patient info if bed is occupied
-            if bed.status == 'occupied' and bed.patient_id:
-                patient = Patient.query.get(bed.patient_id)
-                if patient:
-                    bed_info['patient_name'] = patient.name
-                    bed_info['oxygen_required'] = patient.oxygen_required
-                    bed_info['oxygen_flow_rate'] = patient.oxygen_flow_rate
-            
-            bed_details.append(bed_info)
         
-        return jsonify({
-            'ward': {
-                'id': ward.id,
-                'name': ward.name,
-                'type': ward.type
-            },
-            'statistics': {
-                'total_beds': total_beds,
-                'occupied_beds': occupied_beds,
-                'available_beds': available_beds,
-                'cleaning_beds': cleaning_beds,
-                'maintenance_beds': maintenance_beds,
-                'reserved_beds': reserved_beds,
-                'occupancy_rate': (occupied_beds / total_beds * 100) if total_beds > 0 else 0
-            },
-            'beds': bed_details,
-            'patients': [
-                {
-                    'name': patient.name,
-                    'age': patient.age,
-                    'gender': patient.gender,
-                    'bed_number': bed.bed_number,
-                    'oxygen_required': patient.oxygen_required,
-                    'oxygen_flow_rate': patient.oxygen_flow_rate,
-                    'admission_date': patient.admitted_on.strftime('%Y-%m-%d') if patient.admitted_on else None
-                }
-                for patient, bed in patients_in_ward
-            ]
-        })
+        return with_etag(jsonify(snapshot), etag)
         
     except Exception as e:
         return jsonify({'error': f'Error loading ward details: {str(e)}'}), 500
@@ -3171,7 +5331,13 @@ def quick_bed_action(bed_id):
                 db.session.add(activity)
         
         db.session.commit()
-        return jsonify({'success': True, 'message': f'Bed {bed.bed_number} updated successfully'})
+        ward = db.session.get(Ward, bed.ward_id)
+        return jsonify(row_delta(
+            render_rows('staff/_bed_change_row.html', [(bed.id, {'bed': bed, 'ward': ward})]),
+            success=True,
+            message=f'Bed {bed.bed_number} updated successfully',
+            stats=ward_card_stats(ward)
+        ))
         
     except Exception as e:
         db.session.rollback()
@@ -3184,6 +5350,10 @@ def get_patient_details(patient_id):
         return jsonify({'error': 'Unauthorized'}), 401
     
     try:
+        etag, _ = get_validator(f'patient_details:{patient_id}', ['patient', 'bed', 'ward', 'medical_record', 'medication'])
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+        
         patient = Patient.query.get(patient_id)
         if not patient:
             return jsonify({'error': 'Patient not found'}), 404
@@ -3198,7 +5368,7 @@ def get_patient_details(patient_id):
         # Get active medications
         active_medications = Medication.query.filter_by(patient_id=patient.id, status='active').all()
         
-        return jsonify({
+        return with_etag(jsonify({
             'patient': {
                 'id': patient.id,
                 'name': patient.name,
@@ -3228,7 +5398,7 @@ def get_patient_details(patient_id):
                 }
                 for med in active_medications
             ]
-        })
+        }), etag)
         
     except Exception as e:
         return jsonify({'error': f'Error loading patient details: {str(e)}'}), 500
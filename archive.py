@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Monthly compliance archive: gzip-compressed NDJSON, one file per entity and month.
+
+Usage:
+    python archive.py export --out archive                      # last month, every entity
+    python archive.py export --out archive --month 2026-09 --month 2026-08
+    python archive.py export --out archive --from 2026-01 --to 2026-06 --entity activity --workers 4
+    python archive.py restore archive --database sqlite:////tmp/scratch.db --month 2026-09
+
+Export writes <out>/<entity>/<YYYY-MM>.ndjson.gz and merges each partition's
+row count, size and SHA-256 into <out>/manifest.json. Partitions are exported
+in parallel over a process pool; each streams its rows off a server-side
+cursor and writes through a bounded buffer, so memory does not grow with the
+size of a month.
+
+Restore checks every file against the manifest, creates the schema in the
+target database and bulk-inserts the rows. A scratch SQLite database is the
+intended target: it does not enforce foreign keys, so a month restores on its
+own without the users or patients it refers to.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, create_engine, event, select
+
+from models import db, ActivityLog, Medication, Patient
+
+# entity -> (model, column that places a row in a month)
+ARCHIVE_ENTITIES = {
+    'activity': (ActivityLog, 'timestamp'),
+    'prescriptions': (Medication, 'created_at'),
+    'admissions': (Patient, 'admitted_on'),
+}
+
+ARCHIVE_BATCH_SIZE = 5000
+ARCHIVE_BUFFER_SIZE = 1024 * 1024  # bytes of NDJSON held before each write
+
+MANIFEST_NAME = 'manifest.json'
+
+class _HashingWriter:
+    """File wrapper that hashes and counts the bytes written through it"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.raw.write(data)
+
+    def flush(self):
+        self.raw.flush()
+
+def month_bounds(month):
+    """('2026-09') -> (datetime(2026, 9, 1), datetime(2026, 10, 1))"""
+    start = datetime.strptime(month, '%Y-%m')
+    if start.month == 12:
+        return start, start.replace(year=start.year + 1, month=1)
+    return start, start.replace(month=start.month + 1)
+
+def month_range(first, last):
+    months = []
+    current, end = datetime.strptime(first, '%Y-%m'), datetime.strptime(last, '%Y-%m')
+    while current <= end:
+        months.append(current.strftime('%Y-%m'))
+        current = month_bounds(current.strftime('%Y-%m'))[1]
+    return months
+
+def previous_month():
+    today = datetime.now(timezone.utc)
+    if today.month == 1:
+        return f'{today.year - 1}-12'
+    return f'{today.year}-{today.month - 1:02d}'
+
+def partition_path(out, entity, month):
+    return os.path.join(out, entity, f'{month}.ndjson.gz')
+
+def encode_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def export_partition(database_url, out, entity, month):
+    """Write one entity-month to its gzip NDJSON file; returns its manifest entry.
+
+    Runs in a pool worker, so it opens its own engine rather than sharing the
+    parent's connections.
+    """
+    model, column_name = ARCHIVE_ENTITIES[entity]
+    table = model.__table__
+    column = table.c[column_name]
+    start, end = month_bounds(month)
+    path = partition_path(out, entity, month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + '.part'
+
+    engine = create_engine(database_url)
+    rows = 0
+    try:
+        with engine.connect() as connection, open(partial, 'wb') as raw:
+            writer = _HashingWriter(raw)
+            query = select(table).where(column >= start, column < end).order_by(table.c.id)
+            result = connection.execution_options(stream_results=True, yield_per=ARCHIVE_BATCH_SIZE).execute(query)
+            # mtime=0 keeps the gzip header, and so the checksum, stable across runs
+            with gzip.GzipFile(filename='', mode='wb', fileobj=writer, mtime=0) as archive:
+                buffer, size = [], 0
+                for row in result.mappings():
+                    line = json.dumps({key: encode_value(value) for key, value in row.items()}, separators=(',', ':')) + '\n'
+                    buffer.append(line)
+                    size += len(line)
+                    rows += 1
+                    if size >= ARCHIVE_BUFFER_SIZE:
+                        archive.write(''.join(buffer).encode('utf-8'))
+                        buffer, size = [], 0
+                if buffer:
+                    archive.write(''.join(buffer).encode('utf-8'))
+        os.replace(partial, path)
+    finally:
+        engine.dispose()
+        if os.path.exists(partial):
+            os.remove(partial)
+
+    return {
+        'entity': entity,
+        'table': table.name,
+        'month': month,
+        'file': os.path.relpath(path, out),
+        'rows': rows,
+        'bytes': writer.size,
+        'sha256': writer.sha256.hexdigest(),
+        'exported_at': datetime.now(timezone.utc).isoformat(),
+    }
+
+def load_manifest(out):
+    path = os.path.join(out, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {'format': 'ndjson+gzip', 'partitions': []}
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(out, manifest):
+    path = os.path.join(out, MANIFEST_NAME)
+    with open(path + '.part', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.part', path)
+
+def run_export(args):
+    from app import app
+
+    with app.app_context():
+        database_url = db.engine.url.render_as_string(hide_password=False)
+
+    entities = args.entity or list(ARCHIVE_ENTITIES)
+    if args.month:
+        months = args.month
+    elif args.from_month:
+        months = month_range(args.from_month, args.to_month or args.from_month)
+    else:
+        months = [previous_month()]
+    os.makedirs(args.out, exist_ok=True)
+
+    entries = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [
+            pool.submit(export_partition, database_url, args.out, entity, month)
+            for entity in entities for month in months
+        ]
+        for future in as_completed(futures):
+            entry = future.result()
+            entries.append(entry)
+            print(f"  {entry['entity']:<14} {entry['month']}  {entry['rows']:>9} rows  {entry['bytes']:>11} bytes")
+
+    manifest = load_manifest(args.out)
+    replaced = {(entry['entity'], entry['month']) for entry in entries}
+    manifest['partitions'] = sorted(
+        [p for p in manifest['partitions'] if (p['entity'], p['month']) not in replaced] + entries,
+        key=lambda p: (p['entity'], p['month'])
+    )
+    save_manifest(args.out, manifest)
+    print(f"Wrote {len(entries)} partition(s); manifest at {os.path.join(args.out, MANIFEST_NAME)}")
+    return 0
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(ARCHIVE_BUFFER_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def restore_partition(connection, archive_dir, entry):
+    """Bulk-insert one partition in batches of ARCHIVE_BATCH_SIZE; returns the row count"""
+    table = ARCHIVE_ENTITIES[entry['entity']][0].__table__
+    datetime_columns = [column.name for column in table.columns if isinstance(column.type, DateTime)]
+    rows = 0
+    batch = []
+    with gzip.open(os.path.join(archive_dir, entry['file']), 'rt', encoding='utf-8') as archive:
+        for line in archive:
+            row = json.loads(line)
+            for name in datetime_columns:
+                if row.get(name):
+                    row[name] = datetime.fromisoformat(row[name])
+            batch.append(row)
+            if len(batch) >= ARCHIVE_BATCH_SIZE:
+                connection.execute(table.insert(), batch)
+                rows += len(batch)
+                batch = []
+    if batch:
+        connection.execute(table.insert(), batch)
+        rows += len(batch)
+    return rows
+
+def run_restore(args):
+    manifest = load_manifest(args.archive)
+    partitions = [
+        entry for entry in manifest['partitions']
+        if (not args.entity or entry['entity'] in args.entity) and (not args.month or entry['month'] in args.month)
+    ]
+    if not partitions:
+        print("No matching partitions in the manifest.")
+        return 1
+
+    for entry in partitions:
+        if file_sha256(os.path.join(args.archive, entry['file'])) != entry['sha256']:
+            print(f"Checksum mismatch for {entry['file']}; nothing restored.")
+            return 1
+
+    engine = create_engine(args.database)
+    if engine.dialect.name == 'sqlite':
+        @event.listens_for(engine, 'connect')
+        def _bulk_load_pragmas(dbapi_connection, connection_record):
+            # Scratch database: trade durability for load speed
+            dbapi_connection.execute('PRAGMA synchronous = OFF')
+            dbapi_connection.execute('PRAGMA journal_mode = MEMORY')
+
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for entry in partitions:
+            rows = restore_partition(connection, args.archive, entry)
+            if rows != entry['rows']:
+                raise RuntimeError(f"{entry['file']}: manifest lists {entry['rows']} rows, file holds {rows}")
+            print(f"  {entry['entity']:<14} {entry['month']}  {rows:>9} rows restored")
+    engine.dispose()
+    print(f"Restored {len(partitions)} partition(s) into {engine.url.render_as_string(hide_password=True)}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Monthly NDJSON archive of activity, prescriptions and admissions')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export = commands.add_parser('export', help='archive entity-month partitions')
+    export.add_argument('--out', required=True, help='archive directory')
+    export.add_argument('--entity', action='append', choices=list(ARCHIVE_ENTITIES))
+    export.add_argument('--month', action='append', help='YYYY-MM; repeatable')
+    export.add_argument('--from', dest='from_month', help='first month of a range, YYYY-MM')
+    export.add_argument('--to', dest='to_month', help='last month of a range, YYYY-MM')
+    export.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+
+    restore = commands.add_parser('restore', help='bulk-load partitions into a scratch database')
+    restore.add_argument('archive', help='archive directory holding manifest.json')
+    restore.add_argument('--database', required=True, help='SQLAlchemy URL of the target database')
+    restore.add_argument('--entity', action='append', choices=list(ARCHIVE_ENTITIES))
+    restore.add_argument('--month', action='append', help='YYYY-MM; repeatable')
+
+    args = parser.parse_args()
+    if args.command == 'export':
+        return run_export(args)
+    return run_restore(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
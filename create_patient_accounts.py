@@ -3,10 +3,8 @@
 Script to create patient accounts for testing the patient dashboard
 """
 
-from app import app, db
+from app import app, db, provision_accounts
 from models import User, Patient
-from werkzeug.security import generate_password_hash
-from datetime import datetime, timezone
 
 def create_patient_accounts():
     with app.app_context():
@@ -15,36 +13,28 @@ def create_patient_accounts():
         
         print(f"Found {len(patients_without_accounts)} patients without accounts")
         
-        created_accounts = 0
+        # Create accounts for first 5 patients, with an email based on the patient name
+        accounts = [
+            (patient.id, {
+                'name': patient.name,
+                'email': f"{patient.name.lower().replace(' ', '.')}@patient.hospital.com",
+                'role': 'patient',
+                'password': 'patient123',  # Default password
+                'patient_id': patient.id
+            })
+            for patient in patients_without_accounts[:5]
+        ]
         
-        for patient in patients_without_accounts[:5]:  # Create accounts for first 5 patients
-            # Generate email based on patient name
-            email = f"{patient.name.lower().replace(' ', '.')}@patient.hospital.com"
-            
-            # Check if email already exists
-            existing_user = User.query.filter_by(email=email).first()
-            if existing_user:
-                print(f"Email {email} already exists, skipping {patient.name}")
-                continue
-            
-            # Create user account
-            new_user = User(
-                name=patient.name,
-                email=email,
-                password_hash=generate_password_hash('patient123'),  # Default password
-                role='patient',
-                patient_id=patient.id,
-                created_at=datetime.now(timezone.utc)
-            )
-            
-            db.session.add(new_user)
-            created_accounts += 1
-            
-            print(f"Created account for {patient.name} - Email: {email}, Password: patient123")
+        # Existing emails are skipped; the rest are hashed in parallel and inserted together
+        created, errors = provision_accounts(accounts)
+        for patient_id, message in errors:
+            print(f"Skipping patient {patient_id}: {message}")
+        for _, _, fields in created:
+            print(f"Created account for {fields['name']} - Email: {fields['email']}, Password: patient123")
         
-        if created_accounts > 0:
+        if created:
             db.session.commit()
-            print(f"\nSuccessfully created {created_accounts} patient accounts!")
+            print(f"\nSuccessfully created {len(created)} patient accounts!")
         else:
             print("No new accounts were created.")
         
@@ -1,4 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from collections import defaultdict
 from datetime import datetime, timezone
 
 db = SQLAlchemy()
@@ -128,6 +132,13 @@ class Notification(db.Model):
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
     user = db.relationship('User', backref='notifications', lazy=True)
 
+# Partial index: unread badge counts only ever touch unread rows. The predicate
+# compiles per dialect (is_read = 0 on SQLite, NOT is_read on PostgreSQL).
+notification_unread_index = db.Index(
+    'idx_notification_unread', Notification.user_id,
+    sqlite_where=~Notification.is_read, postgresql_where=~Notification.is_read
+)
+
 class Appointment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('patient.id'), nullable=False, index=True)
@@ -153,3 +164,253 @@ class EmergencyAlert(db.Model):
     resolved_at = db.Column(db.DateTime, nullable=True)
     reporter = db.relationship('User', foreign_keys=[reported_by], backref='reported_alerts', lazy=True)
     resolver = db.relationship('User', foreign_keys=[resolved_by], backref='resolved_alerts', lazy=True)
+
+class BedCounter(db.Model):
+    # Materialized bed count per (ward, status); kept in step with Bed by the flush hook below
+    ward_id = db.Column(db.Integer, db.ForeignKey('ward.id'), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+BED_STATUSES = ['empty', 'occupied', 'reserved', 'cleaning', 'maintenance']
+
+def _attr_change(obj, key):
+    """Return (old, new) values of an attribute from its pending history"""
+    history = inspect(obj).attrs[key].history
+    new = getattr(obj, key)
+    if history.deleted:
+        old = history.deleted[0]
+    elif history.unchanged:
+        old = history.unchanged[0]
+    else:
+        old = new
+    return old, new
+
+def apply_bed_counter_deltas(connection, deltas):
+    """Add {(ward_id, status): delta} to the bed counters within the current transaction"""
+    table = BedCounter.__table__
+    for (ward_id, status), delta in deltas.items():
+        if not delta or ward_id is None:
+            continue
+        result = connection.execute(
+            table.update()
+            .where(table.c.ward_id == ward_id, table.c.status == status)
+            .values(count=table.c.count + delta)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(ward_id=ward_id, status=status, count=delta))
+
+@event.listens_for(Session, 'after_flush')
+def _update_bed_counters(session, flush_context):
+    deltas = defaultdict(int)
+    for obj in session.new:
+        if isinstance(obj, Bed):
+            deltas[(obj.ward_id, obj.status or 'empty')] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Bed):
+            old_ward, _ = _attr_change(obj, 'ward_id')
+            old_status, _ = _attr_change(obj, 'status')
+            deltas[(old_ward, old_status or 'empty')] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, Bed) and session.is_modified(obj):
+            old_ward, new_ward = _attr_change(obj, 'ward_id')
+            old_status, new_status = _attr_change(obj, 'status')
+            if (old_ward, old_status) != (new_ward, new_status):
+                deltas[(old_ward, old_status or 'empty')] -= 1
+                deltas[(new_ward, new_status or 'empty')] += 1
+    if deltas:
+        apply_bed_counter_deltas(session.connection(), deltas)
+
+def rebuild_bed_counters(session, fix=True):
+    """Recompute the bed counters from Bed and return the rows that had drifted.
+
+    With fix=False the counters are only verified and left untouched.
+    """
+    actual = defaultdict(int)
+    for ward_id, status, count in session.query(Bed.ward_id, Bed.status, func.count(Bed.id)).group_by(Bed.ward_id, Bed.status):
+        actual[(ward_id, status or 'empty')] += count
+    stored = {(c.ward_id, c.status): c.count for c in session.query(BedCounter).all()}
+
+    drift = []
+    for ward_id, status in sorted(set(actual) | set(stored), key=lambda k: (k[0], k[1])):
+        expected = actual.get((ward_id, status), 0)
+        found = stored.get((ward_id, status), 0)
+        if expected != found:
+            drift.append({'ward_id': ward_id, 'status': status, 'stored': found, 'actual': expected})
+
+    if fix and drift:
+        session.query(BedCounter).delete()
+        session.add_all([
+            BedCounter(ward_id=ward_id, status=status, count=count)
+            for (ward_id, status), count in actual.items()
+        ])
+        session.commit()
+    return drift
+
+class DataVersion(db.Model):
+    # Per-table write counter, bumped as the writing transaction commits
+    name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+def bump_data_versions(session, names):
+    """Queue a bump of the data version of every name (normally a table name).
+
+    Names collect in session.info across flushes and Core helpers and are
+    bumped once, just before the transaction commits (see _apply_data_versions),
+    so version rows are locked briefly and always in the same order.
+    """
+    session.info.setdefault('version_names', set()).update(names)
+
+def _upsert_data_versions(connection, names):
+    """Increment every name's version in one sorted pass; returns {name: new version}.
+
+    One INSERT ... ON CONFLICT DO UPDATE, so a name seen for the first time by
+    two writers at once cannot fail on the primary key.
+    """
+    table = DataVersion.__table__
+    rows = [{'name': name, 'version': 1} for name in sorted(names)]
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        statement = insert(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.name], set_={'version': table.c.version + 1}
+        ).returning(table.c.name, table.c.version)
+        return dict(connection.execute(statement).all())
+    for row in rows:
+        result = connection.execute(
+            table.update().where(table.c.name == row['name']).values(version=table.c.version + 1)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+    return dict(connection.execute(select(table.c.name, table.c.version).where(table.c.name.in_(names))).all())
+
+def ward_version_key(ward_id):
+    """Scoped data version covering one ward's row, its beds and the patients in them"""
+    return f'ward:{ward_id}'
+
+def patient_version_key(patient_id):
+    """Scoped data version covering one patient's row, bed, records, medications and appointments"""
+    return f'patient:{patient_id}'
+
+def _scoped_version_keys(connection, changed):
+    """Narrower version names touched by the changed objects, next to the per-table ones"""
+    names = set()
+    patient_ids = set()
+    for obj in changed:
+        if isinstance(obj, Ward):
+            names.add(ward_version_key(obj.id))
+        elif isinstance(obj, Bed):
+            # A bed moved between wards (or patients) invalidates both sides
+            names.update(ward_version_key(ward_id) for ward_id in _attr_change(obj, 'ward_id') if ward_id is not None)
+            names.update(patient_version_key(patient_id) for patient_id in _attr_change(obj, 'patient_id') if patient_id is not None)
+        elif isinstance(obj, Patient):
+            patient_ids.add(obj.id)
+            names.add(patient_version_key(obj.id))
+        elif isinstance(obj, (MedicalRecord, Medication, Appointment)):
+            names.update(patient_version_key(patient_id) for patient_id in _attr_change(obj, 'patient_id') if patient_id is not None)
+    if patient_ids:
+        ward_ids = connection.execute(
+            select(Bed.ward_id).where(Bed.patient_id.in_(patient_ids)).distinct()
+        ).scalars()
+        names.update(ward_version_key(ward_id) for ward_id in ward_ids)
+    return names
+
+@event.listens_for(Session, 'after_flush')
+def _bump_data_versions(session, flush_context):
+    names = set()
+    changed = list(session.new) + list(session.deleted)
+    changed += [obj for obj in session.dirty if session.is_modified(obj)]
+    for obj in changed:
+        names.add(obj.__table__.name)
+    names.discard(DataVersion.__table__.name)
+    names.discard(ChangeLog.__table__.name)
+    if names:
+        names |= _scoped_version_keys(session.connection(), changed)
+        bump_data_versions(session, names)
+
+def get_data_versions(session, names):
+    """Return the current versions of the given names as a tuple, in the order given"""
+    rows = dict(session.query(DataVersion.name, DataVersion.version).filter(DataVersion.name.in_(names)).all())
+    return tuple(rows.get(name, 0) for name in names)
+
+class ChangeLog(db.Model):
+    # Append-only feed of row upserts and deletes for the incremental exports.
+    # version is the table's data version as the writing transaction commits;
+    # writers bump and hold that version row until they commit, so versions
+    # follow commit order.
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # 'upsert' or 'delete'
+    changed_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    __table_args__ = (db.Index('idx_change_log_table_version', 'table_name', 'version'),)
+
+CHANGE_TRACKED_TABLES = {'bed', 'patient', 'medication', 'medical_record', 'shift', 'inventory', 'user'}
+
+def record_changes(session, changes):
+    """Queue (table_name, row_id, op) change log entries.
+
+    They are written as the transaction commits, at the versions their tables
+    are bumped to in that same pass.
+    """
+    session.info.setdefault('pending_changes', []).extend(changes)
+
+def record_bulk_write(session, table_name, row_ids, op='upsert', scoped_names=()):
+    """Keep data versions and the change log in step with a set-based Core write.
+
+    Core INSERT/UPDATE statements skip the flush hooks; call this in the same
+    transaction with the ids the statement touched (and any scoped version
+    names, e.g. ward_version_key(...)) so caches and incremental exports see it.
+    """
+    row_ids = list(row_ids)
+    if not row_ids:
+        return
+    bump_data_versions(session, [table_name, *scoped_names])
+    record_changes(session, [(table_name, row_id, op) for row_id in row_ids])
+
+@event.listens_for(Session, 'after_flush')
+def _record_changes(session, flush_context):
+    changes = []
+    for obj in list(session.new) + [obj for obj in session.dirty if session.is_modified(obj)]:
+        if obj.__table__.name in CHANGE_TRACKED_TABLES:
+            changes.append((obj.__table__.name, obj.id, 'upsert'))
+    for obj in session.deleted:
+        if obj.__table__.name in CHANGE_TRACKED_TABLES:
+            changes.append((obj.__table__.name, obj.id, 'delete'))
+    if changes:
+        record_changes(session, changes)
+
+@event.listens_for(Session, 'before_commit')
+def _apply_data_versions(session):
+    # before_commit runs ahead of commit's own final flush; flush here so that
+    # flush's version names and changes are part of this pass
+    session.flush()
+    names = session.info.pop('version_names', set())
+    changes = list(dict.fromkeys(session.info.pop('pending_changes', [])))
+    names |= {table_name for table_name, _, _ in changes}
+    if not names:
+        return
+    connection = session.connection()
+    versions = _upsert_data_versions(connection, names)
+    if changes:
+        now = datetime.now(timezone.utc)
+        connection.execute(ChangeLog.__table__.insert(), [
+            {'table_name': table_name, 'row_id': row_id, 'op': op, 'version': versions[table_name], 'changed_at': now}
+            for table_name, row_id, op in changes
+        ])
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_data_versions(session):
+    session.info.pop('version_names', None)
+    session.info.pop('pending_changes', None)
+
+def prune_change_log(session, before):
+    """Delete change log entries older than before; returns the number removed.
+
+    Consumers whose watermark falls behind the oldest remaining entry are told
+    to resync from a snapshot.
+    """
+    removed = session.query(ChangeLog).filter(ChangeLog.changed_at < before).delete(synchronize_session=False)
+    session.commit()
+    return removed
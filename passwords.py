@@ -0,0 +1,62 @@
+"""
+Parallel password hashing for account provisioning.
+
+PBKDF2 is deliberately slow, so batches are hashed across a process pool.
+This module has no import-time side effects: pool workers load it (through
+the forkserver preload where available) and never need the web app. Workers
+still re-import the main script as __mp_main__, which is why app.py keeps its
+database setup out of that path.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import generate_password_hash
+
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_PARALLEL_MIN = 8  # smaller batches are hashed in-process
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def pool_context():
+    """forkserver where the platform has it, else spawn; never fork.
+
+    The web worker already runs threads (exports, SSE), so its state must not
+    be forked. forkserver workers are forked from a clean server process that
+    preloads only this module.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context('spawn')
+
+def password_hash_pool():
+    """Shared hashing pool, started on first use; None where processes are unavailable"""
+    global _pool
+    with _pool_lock:
+        if _pool is None and PASSWORD_HASH_WORKERS > 1:
+            try:
+                _pool = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, mp_context=pool_context())
+            except (OSError, NotImplementedError):
+                # Serverless sandboxes without /dev/shm cannot start a pool
+                _pool = False
+        return _pool or None
+
+def hash_passwords(passwords):
+    """generate_password_hash over a batch, in parallel when the batch is big enough"""
+    global _pool
+    pool = password_hash_pool() if len(passwords) >= PASSWORD_HASH_PARALLEL_MIN else None
+    if pool is not None:
+        chunksize = max(1, len(passwords) // (PASSWORD_HASH_WORKERS * 4))
+        try:
+            return list(pool.map(generate_password_hash, passwords, chunksize=chunksize))
+        except BrokenProcessPool:
+            # A worker died (or could not start); stop using the pool and hash here
+            with _pool_lock:
+                _pool = False
+    return [generate_password_hash(password) for password in passwords]
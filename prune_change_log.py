@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Delete old entries from the change log behind the incremental exports.
+
+Usage:
+    python prune_change_log.py            # keep the last 30 days
+    python prune_change_log.py --days 90  # keep the last 90 days
+
+Consumers whose watermark is older than what remains get a 410 from
+/api/changes/<entity> and resync from a snapshot.
+"""
+
+import sys
+from datetime import datetime, timedelta, timezone
+
+from app import app
+from models import db, prune_change_log
+
+def main():
+    args = sys.argv[1:]
+    days = int(args[args.index('--days') + 1]) if '--days' in args else 30
+
+    with app.app_context():
+        removed = prune_change_log(db.session, datetime.now(timezone.utc) - timedelta(days=days))
+
+    print(f"Removed {removed} change log entries older than {days} days.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Recompute the materialized ward x status bed counters from the Bed table.
+
+Usage:
+    python rebuild_bed_counters.py           # report drift and rewrite the counters
+    python rebuild_bed_counters.py --verify  # only report drift, exit 1 if any
+"""
+
+import sys
+
+from app import app
+from models import db, rebuild_bed_counters
+
+def main():
+    verify_only = '--verify' in sys.argv[1:]
+
+    with app.app_context():
+        drift = rebuild_bed_counters(db.session, fix=not verify_only)
+
+    if not drift:
+        print("Bed counters are in sync with the bed table.")
+        return 0
+
+    print(f"Found {len(drift)} drifted counter(s):")
+    for row in drift:
+        print(f"  ward {row['ward_id']:>4} {row['status']:<12} stored={row['stored']:<6} actual={row['actual']}")
+
+    if verify_only:
+        return 1
+    print("Counters rebuilt from the bed table.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
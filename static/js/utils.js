@@ -42,23 +42,39 @@ function setLoading(element, isLoading) {
     }
 }
 
+// Last ETag and body seen per GET url, so unchanged polls come back as an empty 304
+const etagCache = new Map();
+
 // API request helper
 async function apiRequest(url, options = {}) {
+    const method = (options.method || 'GET').toUpperCase();
+    const cached = method === 'GET' ? etagCache.get(url) : null;
+    
     try {
         const response = await fetch(url, {
+            ...options,
             headers: {
                 'Content-Type': 'application/json',
+                ...(cached ? { 'If-None-Match': cached.etag } : {}),
                 ...options.headers
-            },
-            ...options
+            }
         });
         
+        if (response.status === 304 && cached) {
+            return cached.data;
+        }
+        
         const data = await response.json();
         
         if (!response.ok) {
             throw new Error(data.error || 'Request failed');
         }
         
+        const etag = response.headers.get('ETag');
+        if (method === 'GET' && etag) {
+            etagCache.set(url, { etag, data });
+        }
+        
         return data;
     } catch (error) {
         console.error('API Request failed:', error);
@@ -97,21 +113,341 @@ function updateDashboardStats(data) {
     });
 }
 
+// Patch a table body from a mutation response: drop rows listed in
+// delta.removed and upsert the server-rendered rows in delta.rows, matched
+// on their data-row-id attribute. New rows are inserted at the top, or at
+// the bottom with { append: true } when loading further pages.
+function applyRowDelta(container, delta, { append = false } = {}) {
+    if (!container || !delta) {
+        return;
+    }
+    
+    (delta.removed || []).forEach(id => {
+        const row = container.querySelector(`[data-row-id="${id}"]`);
+        if (row) {
+            row.remove();
+        }
+    });
+    
+    (delta.rows || []).forEach(({ id, html }) => {
+        const template = document.createElement('template');
+        template.innerHTML = html.trim();
+        const row = template.content.firstElementChild;
+        if (!row) {
+            return;
+        }
+        const existing = container.querySelector(`[data-row-id="${id}"]`);
+        if (existing) {
+            existing.replaceWith(row);
+        } else if (append) {
+            container.append(row);
+        } else {
+            container.prepend(row);
+        }
+    });
+}
+
+// Update summary cards tagged with data-stat="<key>" from a stats object
+function applyStats(stats, root = document) {
+    if (!stats) {
+        return;
+    }
+    
+    Object.entries(stats).forEach(([key, value]) => {
+        root.querySelectorAll(`[data-stat="${key}"]`).forEach(element => {
+            element.textContent = value;
+        });
+    });
+}
+
+// Infinite scroll over a keyset-paged endpoint that answers
+// { rows, next_cursor }. The container carries the first page's cursor in
+// data-next-cursor; the returned reload(params) restarts from page one with
+// new filter parameters. Pass scrollElement when the rows live in an element
+// that does not scroll itself, such as a table body.
+function setupInfiniteScroll(container, url, { params = {}, onPage = null, scrollElement = container } = {}) {
+    let cursor = container.dataset.nextCursor || null;
+    let filters = params;
+    let loading = false;
+    
+    async function loadPage(reset = false) {
+        if (loading || (!reset && !cursor)) {
+            return;
+        }
+        loading = true;
+        try {
+            const query = new URLSearchParams(
+                Object.entries(filters).filter(([, value]) => value !== '' && value != null)
+            );
+            if (!reset) {
+                query.set('cursor', cursor);
+            }
+            const data = await apiRequest(`${url}?${query}`);
+            if (reset) {
+                container.innerHTML = '';
+                scrollElement.scrollTop = 0;
+            }
+            applyRowDelta(container, data, { append: true });
+            cursor = data.next_cursor;
+            if (onPage) {
+                onPage(data);
+            }
+        } finally {
+            loading = false;
+        }
+    }
+    
+    scrollElement.addEventListener('scroll', () => {
+        if (scrollElement.scrollTop + scrollElement.clientHeight >= scrollElement.scrollHeight - 100) {
+            loadPage();
+        }
+    });
+    
+    return {
+        reload(newParams = {}) {
+            filters = newParams;
+            return loadPage(true);
+        }
+    };
+}
+
+// Start a file download by navigation, so the browser streams the response
+// to disk as it arrives instead of buffering it into a Blob first
+function downloadExport(url) {
+    const a = document.createElement('a');
+    a.style.display = 'none';
+    a.href = url;
+    a.download = '';
+    document.body.appendChild(a);
+    a.click();
+    document.body.removeChild(a);
+}
+
+// Run an export as a background job: queue it, poll its status, then download
+// the finished file. onProgress receives the job on every poll. Where the
+// server cannot run background jobs (501) it names the streaming export
+// instead, which is downloaded directly and null returned.
+async function runExportJob(entity, { filters = {}, format = 'csv', onProgress = null, interval = 1500 } = {}) {
+    const response = await fetch('/api/exports', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ entity, format, filters })
+    });
+    const data = await response.json();
+    if (response.status === 501 && data.export_url) {
+        downloadExport(data.export_url);
+        return null;
+    }
+    if (!response.ok) {
+        const error = new Error(data.error || 'Request failed');
+        showToast(error.message, 'error');
+        throw error;
+    }
+    let { job } = data;
+    while (job.status === 'queued' || job.status === 'running') {
+        if (onProgress) onProgress(job);
+        await new Promise(resolve => setTimeout(resolve, interval));
+        ({ job } = await apiRequest(job.status_url));
+    }
+    if (job.status !== 'done') {
+        const error = new Error(job.error || `Export ${job.status}`);
+        showToast(error.message, 'error');
+        throw error;
+    }
+    downloadExport(job.download_url);
+    return job;
+}
+
+// Escape text for interpolation into HTML built on the client
+function escapeHtml(value) {
+    const div = document.createElement('div');
+    div.textContent = value == null ? '' : String(value);
+    return div.innerHTML;
+}
+
+// Bed status badge, as rendered by the bed tables
+const BED_STATUS_BADGES = {
+    empty: ['text-green-500', 'Available'],
+    occupied: ['text-red-500', 'Occupied'],
+    reserved: ['text-yellow-500', 'Reserved'],
+    cleaning: ['text-orange-500', 'Cleaning'],
+    maintenance: ['text-gray-500', 'Maintenance']
+};
+
+function bedStatusBadge(status) {
+    const [dotClass, label] = BED_STATUS_BADGES[status] || ['text-gray-400', status];
+    return `<span class="inline-flex px-2 py-1 text-xs font-semibold rounded-full border status-${escapeHtml(status)}">` +
+        `<i class="fas fa-circle ${dotClass} mr-1"></i>${escapeHtml(label)}</span>`;
+}
+
+// Patient cell of a bed table row, from a /api/beds/board row
+function bedPatientCell(bed) {
+    if (!bed.patient_id) {
+        return '<span class="text-sm text-gray-400">-</span>';
+    }
+    const gender = bed.patient_gender ? bed.patient_gender.charAt(0).toUpperCase() + bed.patient_gender.slice(1) : '';
+    return `<div class="text-sm font-medium text-gray-900">${escapeHtml(bed.patient_name)}</div>` +
+        `<div class="text-sm text-gray-500">${escapeHtml(bed.patient_age)}y, ${escapeHtml(gender)}</div>`;
+}
+
+// Virtual scrolling over an offset-windowed endpoint answering
+// { rows, total }. Only the rows in view (plus overscan) are in the DOM;
+// spacer rows above and below keep the scrollbar sized for the whole result.
+// Rows are fetched in blocks of pageSize and rendered by renderRow(row),
+// which returns a <tr>. The returned controller exposes reload(params) to
+// start over with new filters, refresh() to refetch what is on screen, and
+// update(rows, removed) to patch rows from a mutation response.
+function setupVirtualTable(tbody, url, { renderRow, scrollElement, params = {}, pageSize = 100, overscan = 10, rowHeight = 64, onPage = null } = {}) {
+    const columns = tbody.closest('table').querySelectorAll('thead th').length;
+    let filters = params;
+    let total = 0;
+    let blocks = new Map();
+    let staleBlocks = new Map();
+    let pending = new Map();
+    let generation = 0;
+    let measured = false;
+    let frame = null;
+    
+    function spacerRow() {
+        const row = document.createElement('tr');
+        const cell = document.createElement('td');
+        cell.colSpan = columns;
+        row.append(cell);
+        return row;
+    }
+    const topSpacer = spacerRow();
+    const bottomSpacer = spacerRow();
+    
+    function fetchBlock(index) {
+        if (blocks.has(index) || pending.has(index)) {
+            return pending.get(index);
+        }
+        const query = new URLSearchParams(
+            Object.entries(filters).filter(([, value]) => value !== '' && value != null)
+        );
+        query.set('offset', index * pageSize);
+        query.set('limit', pageSize);
+        const requestGeneration = generation;
+        const inFlight = pending;
+        const request = apiRequest(`${url}?${query}`)
+            .then(data => {
+                if (requestGeneration !== generation) {
+                    return;
+                }
+                blocks.set(index, data.rows);
+                total = data.total;
+                if (onPage) {
+                    onPage(data);
+                }
+                render();
+            })
+            .finally(() => inFlight.delete(index));
+        pending.set(index, request);
+        return request;
+    }
+    
+    function rowAt(position) {
+        const index = Math.floor(position / pageSize);
+        const block = blocks.get(index) || staleBlocks.get(index);
+        if (!blocks.has(index)) {
+            fetchBlock(index);
+        }
+        return block ? block[position % pageSize] : null;
+    }
+    
+    function render() {
+        const first = Math.max(0, Math.floor(scrollElement.scrollTop / rowHeight) - overscan);
+        const last = Math.min(total, Math.ceil((scrollElement.scrollTop + scrollElement.clientHeight) / rowHeight) + overscan);
+        const rows = [];
+        for (let position = first; position < last; position++) {
+            const data = rowAt(position);
+            let row;
+            if (data) {
+                row = renderRow(data);
+            } else {
+                // Placeholder until the block holding this row arrives
+                row = spacerRow();
+                row.firstChild.style.height = `${rowHeight}px`;
+            }
+            rows.push(row);
+        }
+        topSpacer.firstChild.style.height = `${first * rowHeight}px`;
+        bottomSpacer.firstChild.style.height = `${Math.max(0, total - last) * rowHeight}px`;
+        tbody.replaceChildren(topSpacer, ...rows, bottomSpacer);
+        
+        // Size the spacers from a real row once one is on screen
+        const sample = rows.find(row => row.dataset.rowId);
+        if (!measured && sample) {
+            measured = true;
+            const height = sample.getBoundingClientRect().height;
+            if (height && Math.abs(height - rowHeight) > 1) {
+                rowHeight = height;
+                render();
+            }
+        }
+    }
+    
+    function restart(keepRows) {
+        generation++;
+        staleBlocks = keepRows ? blocks : new Map();
+        blocks = new Map();
+        pending = new Map();
+        return fetchBlock(Math.floor(scrollElement.scrollTop / rowHeight / pageSize));
+    }
+    
+    scrollElement.addEventListener('scroll', () => {
+        if (!frame) {
+            frame = requestAnimationFrame(() => {
+                frame = null;
+                render();
+            });
+        }
+    });
+    
+    return {
+        reload(newParams = {}) {
+            filters = newParams;
+            scrollElement.scrollTop = 0;
+            return restart(false);
+        },
+        refresh() {
+            return restart(true);
+        },
+        update(rows = [], removed = []) {
+            // Patch rows in place; anything that moves rows around needs a refetch
+            const filtered = Object.values(filters).some(value => value !== '' && value != null);
+            const patched = rows.every(row => {
+                for (const block of blocks.values()) {
+                    const position = block.findIndex(existing => existing.id === row.id);
+                    if (position !== -1) {
+                        block[position] = row;
+                        return true;
+                    }
+                }
+                return false;
+            });
+            if (removed.length || filtered || !patched) {
+                return this.refresh();
+            }
+            render();
+            return Promise.resolve();
+        }
+    };
+}
+
 // Initialize common functionality
 document.addEventListener('DOMContentLoaded', function() {
-    // Setup auto-refresh
-    setupAutoRefresh();
-    
-    // Add loading states to forms
-    const forms = document.querySelectorAll('form');
-    forms.forEach(form => {
-        form.addEventListener('submit', function(e) {
-            const submitBtn = form.querySelector('button[type="submit"]');
-            if (submitBtn) {
-                submitBtn.setAttribute('data-original-text', submitBtn.innerHTML);
-                setLoading(submitBtn, true);
-            }
-        });
+    // Add loading states to forms that actually submit; forms handled by
+    // fetch call preventDefault and manage their own buttons
+    document.addEventListener('submit', function(e) {
+        if (e.defaultPrevented) {
+            return;
+        }
+        const submitBtn = e.target.querySelector('button[type="submit"]');
+        if (submitBtn) {
+            submitBtn.setAttribute('data-original-text', submitBtn.innerHTML);
+            setLoading(submitBtn, true);
+        }
     });
 });
 
@@ -123,5 +459,14 @@ window.HospitalUtils = {
     setLoading,
     apiRequest,
     setupAutoRefresh,
-    updateDashboardStats
+    updateDashboardStats,
+    applyRowDelta,
+    applyStats,
+    setupInfiniteScroll,
+    setupVirtualTable,
+    downloadExport,
+    runExportJob,
+    escapeHtml,
+    bedStatusBadge,
+    bedPatientCell
 };